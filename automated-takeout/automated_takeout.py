@@ -5,14 +5,24 @@ Creates album exports and saves them to Google Drive
 Uses album_state.yml to track which albums to export and how to group them
 """
 import argparse
+import copy
+import hashlib
+import json
 import os
 import sys
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import yaml
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+try:
+    # libyaml C bindings are an order of magnitude faster than the pure-Python loader
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+from playwright.sync_api import sync_playwright, expect, TimeoutError as PlaywrightTimeout
 
 BROWSER_PROFILE = os.getenv("BROWSER_PROFILE", "/browser-profile")
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
@@ -21,7 +31,101 @@ VNC_PORT = os.getenv("VNC_PORT", "6901")
 TAKEOUT_URL = os.getenv("TAKEOUT_URL", "https://takeout.google.com/settings/takeout/custom/photos")
 SLEEP_MULTIPLIER = float(os.getenv("SLEEP_MULTIPLIER", "1"))
 GOOGLE_PASSWORD = os.getenv("GOOGLE_PASSWORD", "")
+# Extra DOM introspection logging; costs Playwright round-trips, so off by default
+TAKEOUT_DEBUG = os.getenv("TAKEOUT_DEBUG", "false").lower() == "true"
+# Number of large-album exports to run concurrently, each in its own browser
+EXPORT_WORKERS = max(1, int(os.getenv("EXPORT_WORKERS", "1")))
+BROWSER_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    # Skip background services and first-run work to cut cold-start time
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,BackForwardCache',
+    '--no-first-run',
+    '--no-default-browser-check'
+]
+# Also drops the "Chrome is being controlled by automated software" infobar
+BROWSER_IGNORE_DEFAULT_ARGS = ['--enable-automation']
+# Resource types the automation never needs; JS/CSS/XHR still load so the app works
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+# Runs before any page script: answers analytics/logging calls locally with 204s
+TELEMETRY_STUB_SCRIPT = r"""(() => {
+    const telemetry = /(google-analytics\.com|doubleclick\.net|play\.google\.com\/log)/;
+    const origFetch = window.fetch;
+    window.fetch = (url, opts) => {
+        const target = typeof url === 'string' ? url : (url && url.url) || '';
+        if (telemetry.test(target)) return Promise.resolve(new Response(null, {status: 204}));
+        return origFetch(url, opts);
+    };
+    const origBeacon = navigator.sendBeacon && navigator.sendBeacon.bind(navigator);
+    navigator.sendBeacon = (url, data) => telemetry.test(String(url)) || !origBeacon ? true : origBeacon(url, data);
+})()"""
+# True once "Create export" has succeeded: redirected to the manage page or the confirmation text is shown
+EXPORT_CREATED_JS = r"""() => location.href.includes('takeout.google.com/manage')
+    || /export is being created|creating a copy|scheduled exports/i.test(document.body ? document.body.innerText : '')"""
 STATE_FILE = Path(__file__).parent / "album_state.yml"
+PHOTOS_FROM_YEAR_PREFIX = 'Photos from '
+PHOTOS_FROM_YEAR_RE = re.compile(r'^Photos from (\d{4})$')
+# JSON copy of the state used for normal runs; the YAML stays the hand-editable source.
+# Tagged with the sha256 of the YAML bytes it was built from.
+STATE_CACHE_FILE = STATE_FILE.with_suffix(".json")
+
+
+def _read_state_cache(digest=None):
+    """
+    Return the state from the JSON sidecar, or None if missing/invalid.
+    If digest is given, the sidecar must also have been built from that YAML hash.
+    """
+    try:
+        with open(STATE_CACHE_FILE, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict):
+        return None
+    if digest is not None and cached.get('sha256') != digest:
+        return None
+    return cached.get('state')
+
+
+def _write_state_cache(state, digest):
+    """Atomically write the JSON sidecar (temp file + rename)."""
+    tmp_path = STATE_CACHE_FILE.with_suffix('.tmp')
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({'sha256': digest, 'state': state}, f)
+        os.replace(tmp_path, STATE_CACHE_FILE)
+    except (OSError, TypeError, ValueError) as e:
+        # Hand-edited YAML may contain values JSON can't hold (e.g. bare dates)
+        print(f"[WARNING] Could not write state cache: {e}")
+        tmp_path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=16)
+def _load_album_state_cached(path, mtime_ns, size):
+    """Parse the state file once per (path, mtime, size); prefer the JSON sidecar."""
+    # Sidecar is written after the YAML, so it is current unless the YAML was edited since
+    try:
+        sidecar_fresh = STATE_CACHE_FILE.stat().st_mtime_ns >= mtime_ns
+    except OSError:
+        sidecar_fresh = False
+    if sidecar_fresh:
+        state = _read_state_cache()
+        if state is not None:
+            return state
+    
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    state = _read_state_cache(digest)
+    if state is None:
+        state = yaml.load(raw, Loader=SafeLoader)
+        _write_state_cache(state, digest)
+    return state
 
 
 def load_album_state():
@@ -30,16 +134,66 @@ def load_album_state():
         print(f"[ERROR] State file not found: {STATE_FILE}")
         sys.exit(1)
     
-    with open(STATE_FILE, 'r') as f:
-        state = yaml.safe_load(f)
-    
+    st = STATE_FILE.stat()
+    # Callers mutate the state, so hand out a copy and keep the cached parse pristine
+    state = copy.deepcopy(_load_album_state_cached(STATE_FILE, st.st_mtime_ns, st.st_size))
+    index_albums(state)
     return state
 
 
-def save_album_state(state):
-    """Save album state to YAML file."""
-    with open(STATE_FILE, 'w') as f:
-        yaml.dump(state, f, default_flow_style=False, sort_keys=False)
+def index_albums(state):
+    """
+    Attach lookup indexes to state: state['_by_name'] ({name: album}) and
+    state['_large_set'] (set of large_albums).
+    Keys starting with '_' are in-memory only and never saved.
+    """
+    state['_by_name'] = {a['name']: a for a in state['albums']}
+    state['_large_set'] = set(state.get('large_albums') or [])
+    return state['_by_name']
+
+
+def save_album_state(state, dirty=True):
+    """Save album state to YAML file. No-op when dirty is False."""
+    if not dirty:
+        return
+    
+    persisted = {k: v for k, v in state.items() if not k.startswith('_')}
+    data = yaml.dump(persisted, Dumper=SafeDumper, default_flow_style=False, sort_keys=False).encode('utf-8')
+    # Write to temp file first, then rename for atomicity
+    tmp_path = STATE_FILE.with_suffix('.yml.tmp')
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, STATE_FILE)
+    except OSError:
+        # A single-file bind mount (as in docker-compose) can't be renamed over; write in place
+        tmp_path.unlink(missing_ok=True)
+        with open(STATE_FILE, 'wb') as f:
+            f.write(data)
+    _write_state_cache(persisted, hashlib.sha256(data).hexdigest())
+    _load_album_state_cached.cache_clear()
+
+
+def block_heavy_resources(context):
+    """Abort image/font/media requests and stub telemetry for every page in the context."""
+    context.route(
+        "**/*",
+        lambda route: route.abort()
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES
+        else route.continue_()
+    )
+    context.add_init_script(TELEMETRY_STUB_SCRIPT)
+
+
+def is_visible_within(locator, timeout=3000):
+    """
+    Wait up to timeout ms for locator to become visible.
+    Polling happens browser-side, so this is one round-trip instead of probe-and-sleep.
+    """
+    try:
+        expect(locator).to_be_visible(timeout=timeout)
+        return True
+    except AssertionError:
+        return False
 
 
 def handle_auth_challenge(page, timeout=10000):
@@ -54,7 +208,7 @@ def handle_auth_challenge(page, timeout=10000):
         
         # Look for the password input field
         password_field = page.locator('input[name="Passwd"]')
-        if password_field.count() == 0:
+        if not is_visible_within(password_field, 5000):
             return False
         
         print("[INFO] Authentication challenge detected, entering password...")
@@ -66,14 +220,12 @@ def handle_auth_challenge(page, timeout=10000):
         
         # Fill in the password
         password_field.fill(GOOGLE_PASSWORD)
-        time.sleep(0.5 * SLEEP_MULTIPLIER)
         
         # Click the Next button (it's in a div with id="passwordNext")
         next_button = page.locator('#passwordNext button, button:has-text("Next")').first
-        if next_button.is_visible():
+        if is_visible_within(next_button):
             next_button.click()
             print("[INFO] Submitted password, waiting for redirect...")
-            time.sleep(3 * SLEEP_MULTIPLIER)
             
             # Wait for redirect back to takeout page
             try:
@@ -95,26 +247,32 @@ def handle_auth_challenge(page, timeout=10000):
         return False
 
 
+@lru_cache(maxsize=4096)
 def is_photos_from_year(album_name):
     """Check if album name matches 'Photos from YYYY' pattern."""
-    return bool(re.match(r'^Photos from \d{4}$', album_name))
+    # Cheap prefix test first; most user albums never reach the regex
+    return album_name.startswith(PHOTOS_FROM_YEAR_PREFIX) and PHOTOS_FROM_YEAR_RE.match(album_name) is not None
 
 
+@lru_cache(maxsize=4096)
 def get_year_from_album_name(album_name):
     """Extract year from 'Photos from YYYY' album name."""
-    match = re.match(r'^Photos from (\d{4})$', album_name)
+    if not album_name.startswith(PHOTOS_FROM_YEAR_PREFIX):
+        return None
+    match = PHOTOS_FROM_YEAR_RE.match(album_name)
     return int(match.group(1)) if match else None
 
 
-def update_album_in_state(state, album_name, album_list_from_page):
+def update_album_in_state(state, album_name, album_list_from_page, current_year=None):
     """
     Update or add album to state file.
     Returns True if album was added/updated, False if skipped.
     """
-    current_year = datetime.now().year
+    if current_year is None:
+        current_year = datetime.now().year
     
     # Check if album exists in state
-    album_entry = next((a for a in state['albums'] if a['name'] == album_name), None)
+    album_entry = state['_by_name'].get(album_name)
     
     if album_entry:
         return True  # Album already exists
@@ -126,9 +284,9 @@ def update_album_in_state(state, album_name, album_list_from_page):
     is_large = False
     frequency = "Export once"
     
-    if is_photos_from_year(album_name):
+    year = get_year_from_album_name(album_name)
+    if year is not None:
         is_large = True
-        year = get_year_from_album_name(album_name)
         if year == current_year:
             frequency = "Export every 2 months for 1 year"
     
@@ -141,10 +299,12 @@ def update_album_in_state(state, album_name, album_list_from_page):
     }
     
     state['albums'].append(new_album)
+    state['_by_name'][album_name] = new_album
     
     # Add to large_albums list if applicable
-    if is_large and album_name not in state['large_albums']:
+    if is_large and album_name not in state['_large_set']:
         state['large_albums'].append(album_name)
+        state['_large_set'].add(album_name)
     
     save_album_state(state)
     return True
@@ -163,6 +323,8 @@ def get_albums_to_export(state, export_all=False, album_filter=None):
     """
     large_albums = []
     small_albums = []
+    if album_filter:
+        album_filter = set(album_filter)
     
     for album in state['albums']:
         album_name = album['name']
@@ -200,15 +362,15 @@ def deselect_all_albums(page):
         # Close any overlays or modals that might be blocking
         try:
             page.keyboard.press("Escape")
-            time.sleep(0.5 * SLEEP_MULTIPLIER)
+            page.locator('div[role="dialog"]:visible').first.wait_for(state="hidden", timeout=2000)
         except:
             pass
         
         deselect_btn = page.locator('button[aria-label="Deselect all"]').first
-        if deselect_btn.is_visible():
+        if is_visible_within(deselect_btn):
             # Try force click to bypass intercepting elements
             deselect_btn.click(force=True)
-            time.sleep(1 * SLEEP_MULTIPLIER)
+            expect(page.locator('input[type="checkbox"]:checked')).to_have_count(0, timeout=5000)
             print("[INFO] Deselected all albums")
     except Exception as e:
         print(f"[WARNING] Could not deselect all: {e}")
@@ -219,52 +381,78 @@ def select_albums(modal, album_names):
     # First, deselect all albums by clicking the "Deselect all" button
     try:
         deselect_btn = modal.locator('button:has-text("Deselect all")').first
-        if deselect_btn.count() > 0:
+        if is_visible_within(deselect_btn):
             deselect_btn.click(force=True)
-            time.sleep(1 * SLEEP_MULTIPLIER)
+            expect(modal.locator('input[type="checkbox"][name]:checked')).to_have_count(0, timeout=5000)
             print("[INFO] Deselected all albums")
     except Exception as e:
         print(f"[WARNING] Could not deselect all: {e}")
     
-    selected_count = 0
+    # Match and click every requested checkbox inside the browser in one round-trip.
+    # Checkbox name attributes match album names but may have leading/trailing spaces.
+    checkboxes = modal.locator('input[type="checkbox"][name]')
+    try:
+        result = checkboxes.evaluate_all("""(els, names) => {
+            const wanted = new Set(names.map(n => n.trim()));
+            const seen = new Set();
+            const result = {selected: [], already: [], last: -1};
+            els.forEach((el, i) => {
+                const name = el.name.trim();
+                if (!wanted.has(name) || seen.has(name)) return;
+                seen.add(name);
+                if (el.checked) {
+                    result.already.push(name);
+                } else {
+                    el.click();
+                    result.selected.push(name);
+                    result.last = i;
+                }
+            });
+            return result;
+        }""", album_names)
+    except Exception as e:
+        print(f"[ERROR] Failed to select albums: {e}")
+        return 0
     
+    selected = set(result['selected'])
+    already = set(result['already'])
     for album_name in album_names:
+        name = album_name.strip()
+        if name in selected:
+            print(f"[INFO] Selected: {album_name}")
+        elif name in already:
+            print(f"[INFO] Already selected: {album_name}")
+        else:
+            print(f"[WARNING] Album not found: {album_name}")
+    selected_count = len(result['selected'])
+    
+    # Confirm the final click landed before the caller moves on
+    if result['last'] >= 0:
         try:
-            # Checkboxes have name attribute matching album name (may have leading/trailing space)
-            # Try exact match first, then with trimmed name
-            checkbox = None
-            
-            # Try exact match
-            if modal.locator(f'input[name="{album_name}"]').count() > 0:
-                checkbox = modal.locator(f'input[name="{album_name}"]').first
-            # Try with leading space
-            elif modal.locator(f'input[name=" {album_name}"]').count() > 0:
-                checkbox = modal.locator(f'input[name=" {album_name}"]').first
-            # Try with trailing space  
-            elif modal.locator(f'input[name="{album_name} "]').count() > 0:
-                checkbox = modal.locator(f'input[name="{album_name} "]').first
-            # Try with both
-            elif modal.locator(f'input[name=" {album_name} "]').count() > 0:
-                checkbox = modal.locator(f'input[name=" {album_name} "]').first
-            
-            if checkbox:
-                if not checkbox.is_checked():
-                    checkbox.check(force=True)
-                    time.sleep(0.5 * SLEEP_MULTIPLIER)
-                    selected_count += 1
-                    print(f"[INFO] Selected: {album_name}")
-                else:
-                    print(f"[INFO] Already selected: {album_name}")
-            else:
-                print(f"[WARNING] Album not found: {album_name}")
-        except Exception as e:
-            print(f"[ERROR] Failed to select {album_name}: {e}")
+            expect(checkboxes.nth(result['last'])).to_be_checked(timeout=5000)
+        except AssertionError as e:
+            print(f"[WARNING] Last album selection not confirmed: {e}")
     
     print(f"[INFO] Selected {selected_count}/{len(album_names)} albums")
     return selected_count
 
 
-def create_album_export(page, album_names, export_name, export_frequency="Export once"):
+def open_takeout_page(page):
+    """
+    Bring the page to a fresh Takeout service selection.
+    After a successful export Google lands on the manage page; following its
+    "Create another export" link keeps the loaded app instead of a full reload.
+    """
+    another_export = page.locator('a:has-text("Create another export")').first
+    if "takeout.google.com/manage" in page.url and another_export.is_visible():
+        another_export.click()
+        page.wait_for_url('**/settings/takeout**', timeout=30000)
+    else:
+        page.goto(TAKEOUT_URL)
+    page.wait_for_load_state("domcontentloaded")
+
+
+def create_album_export(page, album_names, export_name, export_frequency="Export once", navigate=True):
     """
     Create a Takeout export for specific albums.
     
@@ -273,34 +461,39 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
         album_names: List of album names to export
         export_name: Human-readable name for logging
         export_frequency: One of "Export once" or "Export every 2 months for 1 year"
+        navigate: If False, page is already on a freshly loaded TAKEOUT_URL
     """
+    if not album_names:
+        print(f"[INFO] Skipping empty export '{export_name}'")
+        return False
+    
     print(f"\n[INFO] Creating export: {export_name}")
     print(f"[INFO] Albums: {len(album_names)}")
     print(f"[INFO] Frequency: {export_frequency}")
     
     try:
         # Go to Google Takeout page
-        page.goto(TAKEOUT_URL)
-        page.wait_for_load_state("domcontentloaded")
-        time.sleep(2 * SLEEP_MULTIPLIER)
+        if navigate:
+            open_takeout_page(page)
+        photos_checkbox = page.locator('input[name="Google Photos"]').first
+        # The service list renders after DOMContentLoaded; wait for it rather than sleeping
+        photos_checkbox.wait_for(state="attached", timeout=30000)
         
         # First, deselect all Google services
         print("[INFO] Deselecting all Google services...")
         try:
             deselect_btn = page.locator('button[aria-label="Deselect all"]').first
-            if deselect_btn.is_visible():
+            if is_visible_within(deselect_btn):
                 deselect_btn.click(force=True)
-                time.sleep(1 * SLEEP_MULTIPLIER)
+                expect(photos_checkbox).not_to_be_checked(timeout=5000)
         except Exception as e:
             print(f"[WARNING] Could not deselect all services: {e}")
         
         # Select only Google Photos
         print("[INFO] Selecting Google Photos service...")
         try:
-            photos_checkbox = page.locator('input[name="Google Photos"]').first
             if not photos_checkbox.is_checked():
                 photos_checkbox.check(force=True)
-                time.sleep(1 * SLEEP_MULTIPLIER)
         except Exception as e:
             print(f"[ERROR] Could not select Google Photos: {e}")
             return False
@@ -309,28 +502,26 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
         print("[INFO] Configuring album selection...")
         
         # Debug: Show what buttons/text we can find related to photos
-        try:
-            # Look for any element containing "photo" or "album"
-            photo_elements = page.locator('text=/photo|album/i').all()
-            print(f"[DEBUG] Found {len(photo_elements)} elements with 'photo' or 'album'")
-            for i, elem in enumerate(photo_elements[:5]):
-                try:
-                    text = elem.inner_text()[:50]  # First 50 chars
+        if TAKEOUT_DEBUG:
+            try:
+                # Look for any element containing "photo" or "album" (texts fetched in one round-trip)
+                photo_texts = page.locator('text=/photo|album/i').evaluate_all(
+                    "els => els.map(el => el.innerText.slice(0, 50))"  # First 50 chars
+                )
+                print(f"[DEBUG] Found {len(photo_texts)} elements with 'photo' or 'album'")
+                for i, text in enumerate(photo_texts[:5]):
                     print(f"  {i+1}. {text}")
-                except:
-                    pass
-        except Exception as e:
-            print(f"[DEBUG] Error listing photo elements: {e}")
+            except Exception as e:
+                print(f"[DEBUG] Error listing photo elements: {e}")
         
         # Try multiple possible button texts
         clicked = False
         for button_text in ["All photo albums included", "Multiple formats", "All photos", "Include all"]:
             try:
                 button = page.locator(f'text="{button_text}"').first
-                if button.count() > 0:
+                if is_visible_within(button, 2000):
                     print(f"[DEBUG] Found button: {button_text}")
                     button.click()
-                    time.sleep(2 * SLEEP_MULTIPLIER)
                     clicked = True
                     break
             except:
@@ -340,32 +531,38 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
             print("[ERROR] Could not find album configuration button")
             return False
         
+        # One locator for the "Google Photos content options" modal, reused for every step below
+        modal = page.locator('div[role="dialog"]:visible').first
+        album_checkboxes = modal.locator('input[type="checkbox"][name]')
+        
         # Wait for the modal with title "Google Photos content options"
         print("[DEBUG] Waiting for album selection modal...")
         try:
             page.wait_for_selector('div[role="dialog"]:has-text("Google Photos content options")', timeout=10000)
             print("[DEBUG] Modal appeared, waiting for checkboxes to load...")
             # Wait for album checkboxes to be present in the modal
-            page.wait_for_selector('div[role="dialog"] input[type="checkbox"][name]', timeout=10000)
-            time.sleep(2 * SLEEP_MULTIPLIER)  # Give extra time for all albums to render
+            album_checkboxes.first.wait_for(state="attached", timeout=10000)
+            # Album list is fetched lazily; let it finish loading before reading it
+            try:
+                page.wait_for_load_state("networkidle", timeout=10000)
+            except PlaywrightTimeout:
+                pass
             print("[DEBUG] Checkboxes loaded")
         except Exception as e:
             print(f"[WARNING] Could not detect modal or checkboxes: {e}")
         
-        # Get the modal element
-        modal = page.locator('div[role="dialog"]').first
-        
         # Debug: List all available albums in the modal
-        try:
-            all_checkboxes = modal.locator('input[type="checkbox"][name]').all()
-            print(f"[DEBUG] Found {len(all_checkboxes)} album checkboxes in modal")
-            if len(all_checkboxes) > 0:
-                print("[DEBUG] First 10 album names:")
-                for i, cb in enumerate(all_checkboxes[:10]):
-                    name = cb.get_attribute('name')
-                    print(f"  {i+1}. '{name}'")
-        except Exception as e:
-            print(f"[DEBUG] Could not list albums: {e}")
+        if TAKEOUT_DEBUG:
+            try:
+                # One round-trip for all names rather than a get_attribute() call per checkbox
+                album_names_on_page = album_checkboxes.evaluate_all("els => els.map(el => el.name)")
+                print(f"[DEBUG] Found {len(album_names_on_page)} album checkboxes in modal")
+                if len(album_names_on_page) > 0:
+                    print("[DEBUG] First 10 album names:")
+                    for i, name in enumerate(album_names_on_page[:10]):
+                        print(f"  {i+1}. '{name}'")
+            except Exception as e:
+                print(f"[DEBUG] Could not list albums: {e}")
         
         # Select specific albums
         selected = select_albums(modal, album_names)
@@ -378,39 +575,35 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
         print("[INFO] Confirming album selection...")
         # Scroll modal to bottom to make OK/Cancel buttons visible
         try:
-            modal_content = page.locator('div[role="dialog"]:visible').first
-            modal_content.evaluate('el => el.scrollTo(0, el.scrollHeight)')
-            time.sleep(1 * SLEEP_MULTIPLIER)
+            modal.evaluate('el => el.scrollTo(0, el.scrollHeight)')
         except Exception as e:
             print(f"[DEBUG] Could not scroll modal: {e}")
         
         # Find OK button - it's a div[role="button"] containing OK span, not a <button> element
-        ok_button = page.locator('div[role="dialog"]:visible div[role="button"]:has(span:text-is("OK"))')
+        ok_button = modal.locator('div[role="button"]:has(span:text-is("OK"))')
         print(f"[DEBUG] Found {ok_button.count()} OK buttons after scroll")
         ok_button.last.click()
-        time.sleep(2 * SLEEP_MULTIPLIER)
+        modal.wait_for(state="hidden", timeout=10000)
         
         # Click "Next step"
         print("[INFO] Proceeding to delivery options...")
         page.locator('button:has-text("Next step")').first.click()
         page.wait_for_load_state("domcontentloaded", timeout=60000)
-        time.sleep(2 * SLEEP_MULTIPLIER)
+        page.locator('input[name="scheduleoptions"]').first.wait_for(state="attached", timeout=30000)
         
         # Select "Add to Drive" - it's a custom combobox, not a native select
         print("[INFO] Selecting 'Add to Drive' destination...")
         try:
             # Click the destination combobox to open it
             dest_combobox = page.locator('[aria-label="Transfer to destination"], [role="combobox"]:has-text("Send download link via email")').first
-            if dest_combobox.is_visible():
+            if is_visible_within(dest_combobox):
                 dest_combobox.click()
-                time.sleep(1 * SLEEP_MULTIPLIER)
                 
                 # Click the "Add to Drive" option
                 drive_option = page.locator('li[data-value="DRIVE"], li:has-text("Add to Drive")').first
-                if drive_option.is_visible():
+                if is_visible_within(drive_option, 5000):
                     drive_option.click()
                     print("[INFO] Selected 'Add to Drive'")
-                    time.sleep(1 * SLEEP_MULTIPLIER)
                 else:
                     print("[WARNING] Could not find 'Add to Drive' option")
             else:
@@ -435,7 +628,6 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
                             max_radio = radio
                     if max_radio and not max_radio.is_checked():
                         max_radio.click(force=True)
-                        time.sleep(0.5 * SLEEP_MULTIPLIER)
             except Exception as e:
                 print(f"[DEBUG] Frequency radio: {e}")
         else:
@@ -444,7 +636,6 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
                 freq_radio = page.locator('input[name="scheduleoptions"][value="1"]').first
                 if not freq_radio.is_checked():
                     freq_radio.click(force=True)
-                    time.sleep(0.5 * SLEEP_MULTIPLIER)
             except Exception as e:
                 print(f"[DEBUG] Frequency radio: {e}")
         
@@ -453,16 +644,14 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
         try:
             # Click the file size combobox to open it (shows "2 GB" by default)
             size_combobox = page.locator('[aria-label="File size select"], [role="combobox"]:has-text("GB")').first
-            if size_combobox.is_visible():
+            if is_visible_within(size_combobox):
                 size_combobox.click()
-                time.sleep(1 * SLEEP_MULTIPLIER)
                 
                 # Click the 50 GB option (data-value="53687091200" = 50GB in bytes)
                 size_50gb = page.locator('li[data-value="53687091200"], li:has-text("50 GB")').first
-                if size_50gb.is_visible():
+                if is_visible_within(size_50gb, 5000):
                     size_50gb.click()
                     print("[INFO] Selected 50 GB file size")
-                    time.sleep(1 * SLEEP_MULTIPLIER)
                 else:
                     print("[WARNING] Could not find 50 GB option in dropdown")
             else:
@@ -473,55 +662,62 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
         # Create export
         print(f"[INFO] Creating export '{export_name}'...")
         page.locator('button:has-text("Create export")').first.click()
-        time.sleep(2 * SLEEP_MULTIPLIER)
+        # Wait for the confirmation, the manage page or a password re-auth prompt
+        confirmation = page.locator('text=/export is being created|creating a copy|scheduled exports/i')
+        try:
+            page.wait_for_function(
+                f"() => location.hostname === 'accounts.google.com' || ({EXPORT_CREATED_JS})()",
+                polling=250, timeout=10000)
+        except PlaywrightTimeout:
+            pass
         
         # Check for authentication challenge (Google sometimes requires password re-entry)
         if "accounts.google.com" in page.url:
             print("[INFO] Redirected to authentication challenge...")
             if handle_auth_challenge(page):
                 print("[INFO] Auth challenge completed, waiting for export confirmation...")
-                time.sleep(2 * SLEEP_MULTIPLIER)
+                try:
+                    page.wait_for_function(EXPORT_CREATED_JS, polling=250, timeout=10000)
+                except PlaywrightTimeout:
+                    pass
             else:
                 print("[ERROR] Failed to complete authentication challenge")
                 return False
         
-        # Wait for confirmation - check for multiple possible outcomes
-        print("[DEBUG] Waiting for export confirmation...")
-        try:
-            # Wait for either the confirmation message or redirect to manage page
-            page.wait_for_selector('text=/export is being created|creating a copy|scheduled exports/i', timeout=10000)
+        # The wait above has already settled; these checks don't wait again
+        if confirmation.count() > 0:
             print(f"[SUCCESS] Export '{export_name}' created successfully!")
             return True
-        except:
-            print("[DEBUG] Standard confirmation not found, checking page content...")
-            
-            # Check again for auth challenge in case it appeared after timeout
-            if "accounts.google.com" in page.url:
-                print("[INFO] Late authentication challenge detected...")
-                if handle_auth_challenge(page):
-                    time.sleep(2 * SLEEP_MULTIPLIER)
-                    print(f"[SUCCESS] Export '{export_name}' created after auth!")
-                    return True
-                else:
-                    print("[ERROR] Failed to complete late authentication challenge")
-                    return False
-            
-            # Check if we're on the manage/summary page (success case)
-            if "takeout.google.com/manage" in page.url:
-                print(f"[SUCCESS] Export '{export_name}' created - redirected to summary page!")
-                return True
-            
-            # Check for scheduled exports message
-            if page.locator('text=/scheduled exports|more scheduled/i').count() > 0:
-                print(f"[SUCCESS] Export '{export_name}' scheduled successfully!")
-                return True
-            
-            # If we're back at the main Takeout page with services listed, export was likely created
-            if page.locator('text=/manage your exports/i').count() > 0 or page.locator('text=/Google Photos/i').count() > 0:
-                print(f"[SUCCESS] Export '{export_name}' appears to have been created!")
+        
+        # Check if we're on the manage/summary page (success case)
+        if "takeout.google.com/manage" in page.url:
+            print(f"[SUCCESS] Export '{export_name}' created - redirected to summary page!")
+            return True
+        
+        print("[DEBUG] Standard confirmation not found, checking page content...")
+        
+        # Check again for auth challenge in case it appeared after timeout
+        if "accounts.google.com" in page.url:
+            print("[INFO] Late authentication challenge detected...")
+            if handle_auth_challenge(page):
+                print(f"[SUCCESS] Export '{export_name}' created after auth!")
                 return True
-            
-            raise
+            else:
+                print("[ERROR] Failed to complete late authentication challenge")
+                return False
+        
+        # Check for scheduled exports message
+        if page.locator('text=/scheduled exports|more scheduled/i').count() > 0:
+            print(f"[SUCCESS] Export '{export_name}' scheduled successfully!")
+            return True
+        
+        # If we're back at the main Takeout page with services listed, export was likely created
+        if page.locator('text=/manage your exports/i').count() > 0 or page.locator('text=/Google Photos/i').count() > 0:
+            print(f"[SUCCESS] Export '{export_name}' appears to have been created!")
+            return True
+        
+        print(f"[ERROR] Failed to create export '{export_name}': no confirmation found")
+        return False
         
     except PlaywrightTimeout as e:
         print(f"[ERROR] Failed to create export '{export_name}': {e}")
@@ -533,6 +729,47 @@ def create_album_export(page, album_names, export_name, export_frequency="Export
         return False
 
 
+def get_export_frequency(state, album_name, current_year):
+    """Determine export frequency from state, falling back to the album name."""
+    album_entry = state['_by_name'].get(album_name)
+    if album_entry and album_entry.get('export_frequency'):
+        return album_entry['export_frequency']
+    # Current year's "Photos from YYYY" album keeps growing, so export it on a schedule
+    if get_year_from_album_name(album_name) == current_year:
+        return "Export every 2 months for 1 year"
+    return "Export once"
+
+
+def mark_album_exported(state, album_name, export_date):
+    """Set last_export_date for album_name. Returns True if the entry changed."""
+    album_entry = state['_by_name'].get(album_name)
+    if not album_entry:
+        return False
+    dirty = album_entry['last_export_date'] != export_date
+    album_entry['last_export_date'] = export_date
+    return dirty
+
+
+def export_album_in_new_browser(storage_state, album_name, export_frequency):
+    """
+    Create a large-album export in a separate browser seeded with the login cookies.
+    Sync Playwright objects are bound to their thread, so each worker starts its own.
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(
+            headless=HEADLESS,
+            args=BROWSER_ARGS,
+            ignore_default_args=BROWSER_IGNORE_DEFAULT_ARGS
+        )
+        try:
+            context = browser.new_context(storage_state=storage_state)
+            block_heavy_resources(context)
+            page = context.new_page()
+            return create_album_export(page, [album_name], f"Large Album - {album_name}", export_frequency)
+        finally:
+            browser.close()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Automated Google Takeout creator for Google Photos albums'
@@ -577,6 +814,10 @@ def main():
         print(f"[INFO] Mode: Export only albums not yet exported")
     
     # Load album state
+    if not SafeLoader.__name__.startswith('C'):
+        print("[WARNING] PyYAML has no libyaml support; using the slower pure-Python loader")
+    if TAKEOUT_DEBUG:
+        print(f"[DEBUG] YAML loader: {SafeLoader.__name__}")
     state = load_album_state()
     print(f"[INFO] Loaded {len(state['albums'])} albums from state file")
     
@@ -623,21 +864,24 @@ def main():
         context = p.chromium.launch_persistent_context(
             user_data_dir=profile_dir,
             headless=HEADLESS,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox'
-            ]
+            args=BROWSER_ARGS,
+            ignore_default_args=BROWSER_IGNORE_DEFAULT_ARGS
         )
+        block_heavy_resources(context)
         page = context.pages[0] if context.pages else context.new_page()
         
         # Check if already logged in by visiting Takeout
         page.goto(TAKEOUT_URL, timeout=60000)
         page.wait_for_load_state("domcontentloaded")
-        time.sleep(2 * SLEEP_MULTIPLIER)
+        email_input = page.locator('input[type="email"]')
+        # Either the service list or the sign-in form shows up once the page is ready
+        try:
+            page.locator('input[name="Google Photos"]').or_(email_input).first.wait_for(state="attached", timeout=10000)
+        except PlaywrightTimeout:
+            pass
         
         # Check if we're on the sign-in page
-        if "accounts.google.com" in page.url or page.locator('input[type="email"]').count() > 0:
+        if "accounts.google.com" in page.url or email_input.count() > 0:
             print("\n" + "="*70)
             print("[WARNING] Google login required!")
             print("="*70)
@@ -657,58 +901,85 @@ def main():
         else:
             print("[INFO] Already logged in!")
         
-        # Create exports
+        # One timestamp for the whole run so every album exported together records the same date
+        run_started = datetime.now()
+        run_started_iso = run_started.isoformat()
+        current_year = run_started.year
+        
+        # Create exports; the first one reuses the page loaded for the login check
+        navigate = False
         success_count = 0
         total_exports = len(large_albums) + (1 if len(small_albums) > 0 else 0)
         
-        # Create individual exports for large albums
-        for i, album_name in enumerate(large_albums, 1):
-            print(f"\n[{i}/{total_exports}] Processing large album: {album_name}")
-            
-            # Determine export frequency from state or album name
-            album_entry = next((a for a in state['albums'] if a['name'] == album_name), None)
-            export_frequency = "Export once"
-            if album_entry and album_entry.get('export_frequency'):
-                export_frequency = album_entry['export_frequency']
-            elif is_photos_from_year(album_name):
-                # Check if it's the current year's album
-                year = get_year_from_album_name(album_name)
-                if year == datetime.now().year:
-                    export_frequency = "Export every 2 months for 1 year"
-            
-            if create_album_export(page, [album_name], f"Large Album - {album_name}", export_frequency):
-                success_count += 1
-                # Update state
-                for album in state['albums']:
-                    if album['name'] == album_name:
-                        album['last_export_date'] = datetime.now().isoformat()
-                        break
-                save_album_state(state)
-                
-                print(f"[INFO] Waiting {int(5 * SLEEP_MULTIPLIER)} seconds before next export...")
-                time.sleep(5 * SLEEP_MULTIPLIER)
-            else:
-                print(f"[WARNING] Failed to export: {album_name}")
-        
-        # Create combined export for small albums
-        if len(small_albums) > 0:
-            print(f"\n[{total_exports}/{total_exports}] Processing small albums batch")
-            export_name = f"Small Albums Batch ({len(small_albums)} albums)"
-            if create_album_export(page, small_albums, export_name):
-                success_count += 1
-                # Update state for all small albums
-                for album in state['albums']:
-                    if album['name'] in small_albums:
-                        album['last_export_date'] = datetime.now().isoformat()
-                save_album_state(state)
+        # State is written once after all exports (or on Ctrl+C / an unexpected error)
+        dirty = False
+        try:
+            # Create individual exports for large albums
+            if EXPORT_WORKERS > 1 and len(large_albums) > 1:
+                print(f"\n[INFO] Exporting {len(large_albums)} large albums with {EXPORT_WORKERS} workers")
+                storage_state = context.storage_state()
+                with ThreadPoolExecutor(max_workers=EXPORT_WORKERS) as executor:
+                    futures = {
+                        executor.submit(
+                            export_album_in_new_browser,
+                            storage_state,
+                            album_name,
+                            get_export_frequency(state, album_name, current_year)
+                        ): album_name
+                        for album_name in large_albums
+                    }
+                    # State is only touched from this thread, as results come back
+                    for future in as_completed(futures):
+                        album_name = futures[future]
+                        try:
+                            exported = future.result()
+                        except Exception as e:
+                            print(f"[ERROR] Export worker failed for '{album_name}': {e}")
+                            exported = False
+                        if exported:
+                            success_count += 1
+                            dirty |= mark_album_exported(state, album_name, run_started_iso)
+                        else:
+                            print(f"[WARNING] Failed to export: {album_name}")
             else:
-                print(f"[WARNING] Failed to export small albums batch")
+                for i, album_name in enumerate(large_albums, 1):
+                    print(f"\n[{i}/{total_exports}] Processing large album: {album_name}")
+                    
+                    export_frequency = get_export_frequency(state, album_name, current_year)
+                    exported = create_album_export(page, [album_name], f"Large Album - {album_name}", export_frequency, navigate)
+                    navigate = True
+                    if exported:
+                        success_count += 1
+                        dirty |= mark_album_exported(state, album_name, run_started_iso)
+                        
+                        # Let the export request settle before navigating away for the next one
+                        try:
+                            page.wait_for_load_state("networkidle", timeout=int(5000 * SLEEP_MULTIPLIER))
+                        except PlaywrightTimeout:
+                            pass
+                    else:
+                        print(f"[WARNING] Failed to export: {album_name}")
+            
+            # Create combined export for small albums
+            if len(small_albums) > 0:
+                print(f"\n[{total_exports}/{total_exports}] Processing small albums batch")
+                export_name = f"Small Albums Batch ({len(small_albums)} albums)"
+                if create_album_export(page, small_albums, export_name, navigate=navigate):
+                    success_count += 1
+                    # Update state for all small albums via the name index
+                    for album_name in set(small_albums):
+                        dirty |= mark_album_exported(state, album_name, run_started_iso)
+                else:
+                    print(f"[WARNING] Failed to export small albums batch")
+        finally:
+            save_album_state(state, dirty)
         
         print(f"\n[INFO] Completed! {success_count}/{total_exports} exports created")
         
-        # Keep browser open for a bit to see results
-        print(f"[INFO] Waiting {int(10 * SLEEP_MULTIPLIER)} seconds before closing...")
-        time.sleep(10 * SLEEP_MULTIPLIER)
+        # Keep a visible browser open for a bit to see results
+        if not HEADLESS:
+            print(f"[INFO] Waiting {int(10 * SLEEP_MULTIPLIER)} seconds before closing...")
+            time.sleep(10 * SLEEP_MULTIPLIER)
         
         context.close()
 
@@ -4,15 +4,22 @@ Immich Takeout Importer
 Monitors for new Google Takeout zip files and imports them to Immich using immich-go
 """
 import atexit
+import bisect
 import fcntl
+import fnmatch
 import json
 import os
+import re
 import sys
-import urllib.request
-import urllib.error
+import threading
 import zipfile
 from pathlib import Path
 
+# Performance note: the hot path here is zip central directory parsing and the
+# Takeout dir walk. Both are bound on bytes read and syscalls, not CPU, so the
+# wins come from caching across runs, fusing passes over each archive and
+# avoiding redundant stat()s - not from vectorizing the Python-side work.
+
 # Lock file to prevent concurrent runs on the same path
 LOCK_DIR = Path(os.getenv("LOCK_DIR", "/tmp"))
 _lock_fd = None
@@ -78,8 +85,10 @@ from takeout_utils import (
     ImportProcessor,
     is_google_photos_path,
     get_zip_contents,
+    zip_central_directory_range,
     get_immich_api_key,
     DEFAULT_IMMICH_SERVER,
+    DEFAULT_METADATA_DIR,
 )
 
 # Script-specific configuration
@@ -88,6 +97,76 @@ DEFAULT_TAKEOUT_DIR = Path(os.getenv("TAKEOUT_DIR", str(IMPORT_DIR) + "/Takeout"
 DEFAULT_TAKEOUT_FILE_FILTER = os.getenv("TAKEOUT_FILE_FILTER", "takeout-*.zip")
 DELETE_AFTER_IMPORT = os.getenv("DELETE_AFTER_IMPORT", "true").lower() == "true"
 RESUME_JOBS_ON_EXIT = os.getenv("RESUME_JOBS_ON_EXIT", "true").lower() == "true"
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", "8"))
+INSPECT_WORKERS = int(os.getenv("INSPECT_WORKERS", str(min(8, (os.cpu_count() or 1) * 2))))
+ZIP_INSPECT_CACHE_FILE = Path(os.getenv("ZIP_INSPECT_CACHE_FILE", str(DEFAULT_METADATA_DIR / "zip_inspect_cache.json")))
+
+# Marker folder names for Google Photos content (English and Dutch exports);
+# one alternation scans the shared "Google " prefix once
+GOOGLE_PHOTOS_RE = re.compile(r"Google (?:Photos|Foto's)")
+GOOGLE_PHOTOS_BYTES_RE = re.compile(rb"Google (?:Photos|Foto's)")
+
+# Takeout part file name -> export prefix, e.g.
+# takeout-20240427T195310Z-002.zip.partial -> takeout-20240427T195310Z
+TAKEOUT_PART_RE = re.compile(r"^(?P<base>(?P<prefix>.*)-(?P<part>[^-]*)\.zip)(?P<partial>\.partial)?$")
+
+# stat results captured from DirEntry during the directory scan
+_zip_stats: dict[Path, os.stat_result] = {}
+
+# Persisted zip verdicts: path -> {size, mtime_ns, valid, has_gphotos}.
+# Entries are only trusted while the file's size and mtime still match.
+_inspect_cache: dict[str, dict] | None = None
+_inspect_cache_dirty = False
+
+
+class _ImmichClient:
+    """Minimal JSON client that keeps one keep-alive connection to the Immich server."""
+    
+    def __init__(self, server_url: str, api_key: str, timeout: int = 30):
+        # Imported lazily: only takeout mode talks to the API, and http.client
+        # drags in ssl/email/socket at startup
+        import http.client
+        import urllib.parse
+        parsed = urllib.parse.urlsplit(server_url)
+        self.conn_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parsed.netloc
+        self.base_path = parsed.path.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.conn = None
+    
+    def request(self, method: str, path: str, payload: dict = None):
+        import http.client
+        headers = {'x-api-key': self.api_key, 'Accept': 'application/json'}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        # Retry once on a fresh connection if the server dropped the idle socket
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = self.conn_class(self.netloc, timeout=self.timeout)
+            try:
+                self.conn.request(method, self.base_path + path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                # Timeouts, ResponseNotReady, etc. leave the connection half-used
+                self.close()
+                raise
+            if response.status >= 400:
+                raise http.client.HTTPException(f"HTTP {response.status} {response.reason} for {self.base_path + path}")
+            return json.loads(data.decode('utf-8')) if data else None
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
 
 
 def resume_immich_jobs(server_url: str = None, api_key: str = None) -> dict:
@@ -110,53 +189,61 @@ def resume_immich_jobs(server_url: str = None, api_key: str = None) -> dict:
         'errors': []
     }
     
-    # Get jobs status
+    client = _ImmichClient(server_url, api_key)
+    clients = [client]
     try:
-        url = f"{server_url}/api/jobs"
-        req = urllib.request.Request(
-            url,
-            headers={'x-api-key': api_key, 'Accept': 'application/json'},
-            method='GET'
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            jobs = json.loads(response.read().decode('utf-8'))
-    except Exception as e:
-        print(f"[ERROR] Failed to get jobs status: {e}")
-        results['errors'].append(f"Failed to get jobs: {e}")
-        return results
-    
-    # Resume paused jobs
-    for job_name, job_info in jobs.items():
-        if not isinstance(job_info, dict):
-            continue
+        # Get jobs status
+        try:
+            jobs = client.request('GET', '/api/jobs')
+        except Exception as e:
+            print(f"[ERROR] Failed to get jobs status: {e}")
+            results['errors'].append(f"Failed to get jobs: {e}")
+            return results
         
-        queue_status = job_info.get('queueStatus', {})
-        is_paused = queue_status.get('isPaused', False)
-        is_active = queue_status.get('isActive', False)
+        if not isinstance(jobs, dict):
+            print(f"[WARNING] Unexpected jobs status response: {jobs!r}")
+            results['errors'].append("Unexpected jobs status response")
+            return results
         
-        if is_paused:
-            try:
-                url = f"{server_url}/api/jobs/{job_name}"
-                data = json.dumps({"command": "resume", "force": False}).encode('utf-8')
-                req = urllib.request.Request(
-                    url,
-                    data=data,
-                    headers={
-                        'x-api-key': api_key,
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    },
-                    method='PUT'
-                )
-                with urllib.request.urlopen(req, timeout=30) as response:
-                    json.loads(response.read().decode('utf-8'))
-                print(f"[INFO] Resumed job: {job_name}")
-                results['resumed'].append(job_name)
-            except Exception as e:
-                print(f"[ERROR] Failed to resume {job_name}: {e}")
-                results['errors'].append(f"{job_name}: {e}")
-        elif is_active:
-            results['already_running'].append(job_name)
+        paused = []
+        for job_name, job_info in jobs.items():
+            if not isinstance(job_info, dict):
+                continue
+            
+            queue_status = job_info.get('queueStatus', {})
+            if queue_status.get('isPaused', False):
+                paused.append(job_name)
+            elif queue_status.get('isActive', False):
+                results['already_running'].append(job_name)
+        
+        # Resume paused jobs concurrently; each worker thread keeps its own
+        # keep-alive connection since http.client connections aren't thread-safe
+        local = threading.local()
+        clients_lock = threading.Lock()
+        
+        def resume_one(job_name):
+            worker_client = getattr(local, 'client', None)
+            if worker_client is None:
+                worker_client = local.client = _ImmichClient(server_url, api_key)
+                with clients_lock:
+                    clients.append(worker_client)
+            worker_client.request('PUT', f"/api/jobs/{job_name}", {"command": "resume", "force": False})
+        
+        if paused:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(RESUME_WORKERS, len(paused))) as executor:
+                futures = [(job_name, executor.submit(resume_one, job_name)) for job_name in paused]
+                for job_name, future in futures:
+                    try:
+                        future.result()
+                        print(f"[INFO] Resumed job: {job_name}")
+                        results['resumed'].append(job_name)
+                    except Exception as e:
+                        print(f"[ERROR] Failed to resume {job_name}: {e}")
+                        results['errors'].append(f"{job_name}: {e}")
+    finally:
+        for c in clients:
+            c.close()
     
     return results
 
@@ -166,20 +253,127 @@ def ensure_dirs():
     # Processor will create its own dirs
 
 
-def has_google_photos(zip_path):
-    """Check if a zip file contains a Google Photos directory."""
+def _zip_stat(zip_path: Path) -> os.stat_result:
+    """Return the stat captured by the last directory scan, falling back to stat()."""
+    st = _zip_stats.get(zip_path)
+    if st is None:
+        st = zip_path.stat()
+    return st
+
+
+def load_inspect_cache() -> dict[str, dict]:
+    """Load persisted zip verdicts from ZIP_INSPECT_CACHE_FILE (once per process)."""
+    global _inspect_cache
+    if _inspect_cache is None:
+        cache = {}
+        if ZIP_INSPECT_CACHE_FILE.exists():
+            try:
+                with open(ZIP_INSPECT_CACHE_FILE, 'r') as f:
+                    cache = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Could not read zip inspect cache: {e}")
+        # Publish only once fully loaded
+        _inspect_cache = cache
+    return _inspect_cache
+
+
+def save_inspect_cache():
+    """Write zip verdicts back to disk if anything changed."""
+    global _inspect_cache_dirty
+    if not _inspect_cache_dirty or _inspect_cache is None:
+        return
     try:
-        print(f"[DEBUG] Inspecting {zip_path.name} ({zip_path.stat().st_size / (1024**3):.2f} GB)")
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            for name in zf.namelist():
-                if "Google Photos" in name or "Google Foto's" in name:
-                    print(f"[DEBUG] Found Google Photos content in {zip_path.name}")
-                    return True
-        print(f"[DEBUG] No Google Photos content in {zip_path.name}")
-        return False
+        ZIP_INSPECT_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = ZIP_INSPECT_CACHE_FILE.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(_inspect_cache, f)
+        tmp_path.rename(ZIP_INSPECT_CACHE_FILE)
+        _inspect_cache_dirty = False
     except Exception as e:
+        print(f"[WARNING] Could not write zip inspect cache: {e}")
+
+
+def prune_inspect_cache(zip_paths: list[Path]):
+    """Drop cached verdicts for zips that are no longer present (e.g. deleted after import)."""
+    global _inspect_cache_dirty
+    if _inspect_cache is None:
+        return
+    present = {str(zip_path) for zip_path in zip_paths}
+    stale = [key for key in _inspect_cache if key not in present]
+    for key in stale:
+        del _inspect_cache[key]
+    if stale:
+        _inspect_cache_dirty = True
+
+
+def _inspect_entry(zip_path: Path) -> dict:
+    """Return the cached verdict entry for a zip, resetting it if the file changed."""
+    global _inspect_cache_dirty
+    cache = load_inspect_cache()
+    st = _zip_stat(zip_path)
+    key = str(zip_path)
+    entry = cache.get(key)
+    if not entry or entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns:
+        entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        cache[key] = entry
+        _inspect_cache_dirty = True
+    return entry
+
+
+def _central_directory_contains(f, pattern: re.Pattern) -> bool | None:
+    """Search the raw central directory bytes of an open zip for a pattern
+    without building ZipInfo objects.
+    
+    Returns None if the central directory could not be located.
+    """
+    file_size = os.fstat(f.fileno()).st_size
+    if file_size == 0:
+        return None
+    cd_range = zip_central_directory_range(f, file_size)
+    if cd_range is None:
+        return None
+    cd_offset, cd_size = cd_range
+    import mmap
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return pattern.search(mm, cd_offset, cd_offset + cd_size) is not None
+
+
+def inspect_zip(zip_path: Path) -> tuple[bool, bool]:
+    """Return (valid, has_google_photos) for a zip, opening it at most once.
+    
+    Verdicts come from the inspect cache when the file is unchanged.
+    """
+    global _inspect_cache_dirty
+    try:
+        entry = _inspect_entry(zip_path)
+    except OSError as e:
         print(f"[WARNING] Could not inspect {zip_path.name}: {e}")
-        return False
+        return False, False
+    if 'valid' in entry and ('has_gphotos' in entry or not entry['valid']):
+        return entry['valid'], entry.get('has_gphotos', False)
+    
+    print(f"[DEBUG] Inspecting {zip_path.name} ({entry['size'] / (1024**3):.2f} GB)")
+    try:
+        with open(zip_path, 'rb') as f:
+            try:
+                # Parsing the central directory fails for corrupted zips
+                zf = zipfile.ZipFile(f, 'r')
+            except Exception:
+                entry['valid'] = False
+            else:
+                with zf:
+                    entry['valid'] = True
+                    found = _central_directory_contains(f, GOOGLE_PHOTOS_BYTES_RE)
+                    if found is None:
+                        # Iterate the parsed ZipInfo list rather than materializing namelist()
+                        found = any(GOOGLE_PHOTOS_RE.search(info.filename) for info in zf.infolist())
+                    entry['has_gphotos'] = found
+                    print(f"[DEBUG] {'Found' if found else 'No'} Google Photos content in {zip_path.name}")
+    except OSError as e:
+        print(f"[WARNING] Could not inspect {zip_path.name}: {e}")
+        entry.setdefault('valid', False)
+    _inspect_cache_dirty = True
+    return entry['valid'], entry.get('has_gphotos', False)
 
 
 def get_zip_media_files(zip_files):
@@ -196,146 +390,173 @@ def get_zip_media_files(zip_files):
                 })
     return media_files
 
-def is_valid_zip(zip_path: Path) -> bool:
-    """Check if a zip file is valid and not corrupted."""
-    try:
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            # Try to read the file list - this will fail for corrupted zips
-            zf.namelist()
-            return True
-    except Exception:
-        return False
 
+def _inspect_one(zip_path: Path) -> tuple[Path, bool, bool]:
+    return (zip_path, *inspect_zip(zip_path))
 
-def filter_valid_zips(zip_files: list[Path]) -> tuple[list[Path], list[Path]]:
-    """
-    Filter zip files, returning (valid_zips, invalid_zips).
-    """
-    valid = []
-    invalid = []
-    
-    for zip_path in zip_files:
-        if is_valid_zip(zip_path):
-            valid.append(zip_path)
-        else:
-            print(f"[WARNING] Corrupted/incomplete zip: {zip_path.name}")
-            invalid.append(zip_path)
+
+def inspect_zips(zip_files: list[Path]) -> dict[Path, tuple[bool, bool]]:
+    """Inspect zips concurrently, returning {zip_path: (valid, has_gphotos)}.
     
-    return valid, invalid
+    The work is seek + central directory reads, so threads overlap the I/O fine.
+    """
+    if INSPECT_WORKERS <= 1 or len(zip_files) <= 1:
+        results = map(_inspect_one, zip_files)
+        return {path: (valid, gphotos) for path, valid, gphotos in results}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=INSPECT_WORKERS) as executor:
+        return {path: (valid, gphotos) for path, valid, gphotos in executor.map(_inspect_one, zip_files)}
 
 
-def find_takeout_exports(takeout_dir: Path, file_filter: str):
-    """Group takeout zip files by export (by date prefix) and check if they contain Google Photos."""
+def scan_takeout_dir(takeout_dir: Path, file_filter: str) -> tuple[list[Path], list[Path]]:
+    """Walk takeout_dir once with os.scandir, returning (zip_files, partial_files).
+    
+    DirEntry caches the file type from readdir, so no extra stat() per match. The
+    zips' stat results are kept in _zip_stats for the size/mtime checks that follow.
+    Each directory is opened relative to its parent's fd, so stat/open lookups
+    don't re-walk the full path from the root.
+    """
+    partial_filter = file_filter + ".partial"
+    dir_flags = os.O_RDONLY | os.O_DIRECTORY
+    zips = []
+    partials = []
+    _zip_stats.clear()
+    stack = [(os.open(takeout_dir, dir_flags), str(takeout_dir))]
+    try:
+        while stack:
+            dir_fd, current = stack.pop()
+            try:
+                with os.scandir(dir_fd) as it:
+                    for entry in it:
+                        entry_path = os.path.join(current, entry.name)
+                        if entry.is_dir(follow_symlinks=False):
+                            try:
+                                stack.append((os.open(entry.name, dir_flags, dir_fd=dir_fd), entry_path))
+                            except PermissionError as e:
+                                print(f"[WARNING] Cannot read directory {entry_path}: {e}")
+                        elif entry.is_file():
+                            # Symlinked files count (as rglob did); symlinked dirs are not followed
+                            if fnmatch.fnmatchcase(entry.name, file_filter):
+                                zip_path = Path(entry_path)
+                                _zip_stats[zip_path] = entry.stat()
+                                zips.append(zip_path)
+                            elif fnmatch.fnmatchcase(entry.name, partial_filter):
+                                partials.append(Path(entry_path))
+            except PermissionError as e:
+                print(f"[WARNING] Cannot read directory {current}: {e}")
+            finally:
+                os.close(dir_fd)
+    finally:
+        for dir_fd, _ in stack:
+            os.close(dir_fd)
+    return zips, partials
+
+
+def iter_takeout_exports(takeout_dir: Path, file_filter: str):
+    """Group takeout zip files by export (by date prefix) and yield
+    (export_prefix, valid_zips) for each export that contains Google Photos.
+    
+    Zips are inspected one export at a time, so the caller can start importing
+    the first export while later ones are still being checked.
+    """
     if not takeout_dir.exists():
         print(f"[INFO] Takeout directory not found: {takeout_dir}")
-        return []
+        return
 
     print(f"[INFO] Scanning {takeout_dir} for takeout exports...")
     
     # Group zip files by their takeout export prefix (e.g., takeout-20240427T195310Z)
     exports = {}
     
-    # Find both .zip and .partial files
-    all_zips = list(takeout_dir.rglob(file_filter))
-    # Also find .partial files based on the filter pattern
-    partial_filter = file_filter + ".partial"
-    all_partials = list(takeout_dir.rglob(partial_filter))
+    # Find both .zip and .partial files in a single walk
+    all_zips, all_partials = scan_takeout_dir(takeout_dir, file_filter)
     
     print(f"[INFO] Found {len(all_zips)} zip file(s), {len(all_partials)} partial file(s)")
     
-    # Build a set of partial file base names (without .partial suffix)
-    # e.g., "takeout-20240427T195310Z-002.zip.partial" -> "takeout-20240427T195310Z-002.zip"
-    partial_bases = set()
-    for partial_path in all_partials:
-        if partial_path.name.endswith('.partial'):
-            base_name = partial_path.name[:-8]  # Remove ".partial"
-            partial_bases.add(base_name)
-    
-    # Build a set of existing valid zip names
-    valid_zip_names = set()
-    for zip_path in all_zips:
-        if zip_path.is_file() and is_valid_zip(zip_path):
-            valid_zip_names.add(zip_path.name)
-    
-    for zip_path in all_zips:
-        if not zip_path.is_file():
-            continue
-        
+    for path in all_zips + all_partials:
         # Extract the export prefix (everything before the part number)
-        # e.g., takeout-20240427T195310Z-001.zip -> takeout-20240427T195310Z
-        parts = zip_path.stem.rsplit('-', 1)
-        if len(parts) == 2:
-            export_prefix = parts[0]
-            if export_prefix not in exports:
-                exports[export_prefix] = {'zips': [], 'has_incomplete_partial': False}
-            exports[export_prefix]['zips'].append(zip_path)
-    
-    # Also register exports that only have .partial files (no .zip yet)
-    for partial_path in all_partials:
-        if partial_path.name.endswith('.partial'):
-            base_name = partial_path.name[:-8]  # Remove ".partial"
-            stem = base_name[:-4]  # Remove ".zip"
-            parts = stem.rsplit('-', 1)
-            if len(parts) == 2:
-                export_prefix = parts[0]
-                if export_prefix not in exports:
-                    exports[export_prefix] = {'zips': [], 'has_incomplete_partial': False}
-                # Check if this partial has a corresponding valid zip
-                if base_name not in valid_zip_names:
-                    exports[export_prefix]['has_incomplete_partial'] = True
-    
-    # Check existing exports for partials without valid zips
-    for export_prefix, export_data in exports.items():
-        for zip_path in export_data['zips']:
-            # Check if there's a .partial for this zip but the zip is invalid
-            if zip_path.name in partial_bases and not is_valid_zip(zip_path):
-                export_data['has_incomplete_partial'] = True
+        # e.g., takeout-20240427T195310Z-001.zip(.partial) -> takeout-20240427T195310Z
+        match = TAKEOUT_PART_RE.match(path.name)
+        if not match:
+            continue
+        export_prefix = match.group('prefix')
+        if export_prefix not in exports:
+            exports[export_prefix] = {'zips': [], 'part_keys': [], 'partial_bases': set()}
+        export_data = exports[export_prefix]
+        if not match.group('partial'):
+            # Keep parts ordered by part number as they are found
+            part = match.group('part')
+            part_key = (int(part) if part.isdigit() else 0, path.name)
+            index = bisect.bisect(export_data['part_keys'], part_key)
+            export_data['part_keys'].insert(index, part_key)
+            export_data['zips'].insert(index, path)
+        else:
+            export_data['partial_bases'].add(match.group('base'))
     
     print(f"[INFO] Found {len(exports)} unique takeout export(s)")
     
-    # Check each export to see if it contains Google Photos
-    # Sort by total size (smallest first) to process quick ones first
-    exports_to_import = []
-    
     def get_export_size(item):
         """Get total size of all zips in an export."""
         export_prefix, export_data = item
-        return sum(z.stat().st_size for z in export_data['zips'] if z.exists())
+        return sum(_zip_stat(z).st_size for z in export_data['zips'])
     
-    for export_prefix, export_data in sorted(exports.items(), key=get_export_size):
-        zip_files = export_data['zips']
-        zip_files.sort()
-        
-        # Skip if there are incomplete partials (partial exists but no valid zip)
-        if export_data['has_incomplete_partial']:
-            print(f"[WARNING] Export {export_prefix}: Has .partial file(s) without valid .zip, skipping (download in progress)")
-            continue
-        
-        # Filter out corrupted/incomplete zips
-        valid_zips, invalid_zips = filter_valid_zips(zip_files)
-        
-        if invalid_zips:
-            print(f"[WARNING] Export {export_prefix}: {len(invalid_zips)} corrupted/incomplete zip(s), skipping entire export")
-            continue
-        
-        if not valid_zips:
-            print(f"[WARNING] Export {export_prefix}: No valid zips, skipping")
-            continue
-        
-        # Check if any valid part contains Google Photos
-        has_photos = False
-        for zip_path in valid_zips:
-            if has_google_photos(zip_path):
-                has_photos = True
-                break
-        
-        if has_photos:
-            print(f"[INFO] Export {export_prefix} has Google Photos ({len(valid_zips)} valid parts)")
-            exports_to_import.append((export_prefix, valid_zips))
-        else:
-            print(f"[DEBUG] Export {export_prefix} has no Google Photos content, skipping")
+    # Load verdicts here, before inspect_zips hands zips to worker threads
+    load_inspect_cache()
     
-    return exports_to_import
+    # Check each export to see if it contains Google Photos
+    # Sort by total size (smallest first) to process quick ones first
+    try:
+        for export_prefix, export_data in sorted(exports.items(), key=get_export_size):
+            zip_files = export_data['zips']
+            zip_names = {zip_path.name for zip_path in zip_files}
+            
+            # A .partial with no zip at all means the download is still in progress
+            if export_data['partial_bases'] - zip_names:
+                print(f"[WARNING] Export {export_prefix}: Has .partial file(s) without valid .zip, skipping (download in progress)")
+                continue
+            
+            inspected = inspect_zips(zip_files)
+            valid_zip_names = {zip_path.name for zip_path, (valid, _) in inspected.items() if valid}
+            
+            # Skip if there are incomplete partials (partial exists but no valid zip)
+            if export_data['partial_bases'] - valid_zip_names:
+                print(f"[WARNING] Export {export_prefix}: Has .partial file(s) without valid .zip, skipping (download in progress)")
+                continue
+            
+            # Filter out corrupted/incomplete zips
+            valid_zips = []
+            invalid_zips = []
+            for zip_path in zip_files:
+                if inspected[zip_path][0]:
+                    valid_zips.append(zip_path)
+                else:
+                    print(f"[WARNING] Corrupted/incomplete zip: {zip_path.name}")
+                    invalid_zips.append(zip_path)
+            
+            if invalid_zips:
+                print(f"[WARNING] Export {export_prefix}: {len(invalid_zips)} corrupted/incomplete zip(s), skipping entire export")
+                continue
+            
+            if not valid_zips:
+                print(f"[WARNING] Export {export_prefix}: No valid zips, skipping")
+                continue
+            
+            # Check if any valid part contains Google Photos
+            has_photos = any(inspected[zip_path][1] for zip_path in valid_zips)
+            
+            if has_photos:
+                print(f"[INFO] Export {export_prefix} has Google Photos ({len(valid_zips)} valid parts)")
+                yield export_prefix, valid_zips
+            else:
+                print(f"[DEBUG] Export {export_prefix} has no Google Photos content, skipping")
+    finally:
+        prune_inspect_cache(all_zips)
+        save_inspect_cache()
+
+
+def find_takeout_exports(takeout_dir: Path, file_filter: str):
+    """Return all (export_prefix, valid_zips) with Google Photos content."""
+    return list(iter_takeout_exports(takeout_dir, file_filter))
 
 
 def import_export_to_immich(export_prefix, zip_files):
@@ -351,7 +572,8 @@ def import_export_to_immich(export_prefix, zip_files):
     success, immich_results = processor.process_google_photos_zips(
         zip_files=zip_files,
         export_prefix=export_prefix,
-        delete_after_import=DELETE_AFTER_IMPORT
+        delete_after_import=DELETE_AFTER_IMPORT,
+        background=True
     )
     return success
 
@@ -361,20 +583,37 @@ def process_google_takeout(takeout_dir: Path, file_filter: str):
     
     Processes all exports, continuing even if some fail.
     Failed jobs are tracked and summarized at the end.
+    Inspection runs on a background thread, so the next export is checked
+    while immich-go imports the current one. Extraction, final metadata and
+    zip deletion for each export also run in the background and are joined
+    before returning.
     """
-    exports = find_takeout_exports(takeout_dir, file_filter)
-
-    if not exports:
-        print(f"[INFO] No new takeout exports with Google Photos content found")
-        return 0
-
-    print(f"[INFO] Found {len(exports)} takeout export(s) with Google Photos to import")
+    import queue
+    
+    export_queue = queue.Queue(maxsize=2)
+    done = object()
+    
+    def produce():
+        try:
+            for export in iter_takeout_exports(takeout_dir, file_filter):
+                export_queue.put(export)
+        except Exception as e:
+            print(f"[ERROR] Failed while scanning takeout exports: {e}")
+        finally:
+            export_queue.put(done)
+    
+    producer = threading.Thread(target=produce, name="takeout-scan", daemon=True)
+    producer.start()
 
     processed = 0
     failed = 0
 
-    for export_prefix, zip_files in exports:
-        print(f"[INFO] Processing {processed + failed + 1}/{len(exports)}: {export_prefix}")
+    while True:
+        export = export_queue.get()
+        if export is done:
+            break
+        export_prefix, zip_files = export
+        print(f"[INFO] Processing {processed + failed + 1}: {export_prefix}")
         try:
             if import_export_to_immich(export_prefix, zip_files):
                 processed += 1
@@ -387,6 +626,15 @@ def process_google_takeout(takeout_dir: Path, file_filter: str):
             print(f"[WARNING] Continuing with next export...")
             import traceback
             traceback.print_exc()
+    
+    producer.join()
+    if processed + failed:
+        ImportProcessor.get_instance().wait_for_background()
+
+    if processed + failed == 0:
+        print(f"[INFO] No new takeout exports with Google Photos content found")
+    else:
+        print(f"[INFO] Imported {processed} of {processed + failed} takeout export(s) with Google Photos")
 
     return processed
 
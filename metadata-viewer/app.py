@@ -2,114 +2,220 @@
 """
 Metadata Viewer - Web UI for viewing Google Takeout import metadata
 """
+import functools
+import hashlib
 import json
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from flask import Flask, render_template, jsonify, send_file, request, make_response
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = Flask(__name__)
 
 METADATA_DIR = Path(os.getenv("METADATA_DIR", "/data/metadata"))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "8"))
+
+
+def loads(data):
+    """Parse JSON from str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(payload, status=200, conditional=False):
+    """Build a JSON response, serializing with orjson when it is installed.
+    
+    With conditional=True the response carries an ETag of its body, and a
+    matching If-None-Match gets an empty 304 instead.
+    """
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+    else:
+        response = app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+    if conditional:
+        response.set_etag(hashlib.blake2b(response.get_data(), digest_size=8).hexdigest())
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.make_conditional(request)
+    return response
 
 
 @app.after_request
 def add_no_cache_headers(response):
     """Add no-cache headers to all responses to prevent stale data."""
+    if 'ETag' in response.headers:
+        # Revalidated on every request via If-None-Match, so it cannot go stale
+        return response
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
     return response
 
 
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+
 def format_size(size_bytes):
     """Format bytes to human readable size."""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} PB"
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} B"
+    # Unit index straight from the magnitude: every 10 bits is one step of 1024
+    i = min((int(size_bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (10 * i)):.1f} {SIZE_UNITS[i]}"
 
 
-def load_metadata_files():
-    """Load all metadata JSON files."""
-    metadata_files = []
+@functools.lru_cache(maxsize=16384)
+def format_timestamp(epoch_seconds):
+    """Return (display, iso) strings for a whole-second epoch timestamp."""
+    dt = datetime.fromtimestamp(epoch_seconds)
+    return dt.strftime('%Y-%m-%d %H:%M:%S'), dt.isoformat()
+
+
+def load_metadata_file(entry, file_mtime):
+    """Parse one metadata JSON file (an os.DirEntry) and add the derived display fields.
+    
+    Returns (data, total_size).
+    """
+    with open(entry.path, 'rb') as mf:
+        data = loads(mf.read())
+    # The per-file records dominate the file size and are only shown on the
+    # detail view, which reads the file itself; keep just their count here
+    files = data.pop('files', None)
+    data['_files_count'] = len(files) if isinstance(files, list) else 0
+    data['_filename'] = entry.name
+    data['_path'] = entry.path
+    data['_modified'], data['_modified_iso'] = format_timestamp(int(file_mtime))
+    
+    # Handle both old zip_file and new zip_files format
+    total_size = 0
+    if 'zip_files' in data:
+        # New format: array of {name, size}
+        total_size = sum(z.get('size', 0) for z in data['zip_files'])
+        data['_zip_size_formatted'] = format_size(total_size)
+        data['_zip_names'] = ', '.join(z.get('name', '') for z in data['zip_files'])
+        data['_zip_count'] = len(data['zip_files'])
+    elif 'zip_size' in data:
+        # Old format: single zip_file and zip_size
+        total_size = data['zip_size']
+        data['_zip_size_formatted'] = format_size(total_size)
+        data['_zip_names'] = data.get('zip_file', 'N/A')
+        data['_zip_count'] = 1
+    elif 'total_size' in data:
+        # Folder import format
+        total_size = data['total_size']
+        data['_zip_size_formatted'] = format_size(total_size)
+        data['_zip_names'] = data.get('source_name', 'N/A')
+        data['_zip_count'] = 0
+    
+    return data, total_size
+
+
+def check_timeout(data, now):
+    """Return data with status 'timeout' if a running import has gone stale.
+    
+    Depends on the current time and log activity rather than the metadata file,
+    so it runs on every request against a copy of the cached entry.
+    """
+    # Check for timeout: if status is 'running' and update_time is older than 2 minutes
+    # Also check if the associated log file is still being written to
+    if data.get('status') != 'running' or 'update_time' not in data:
+        return data
+    try:
+        update_time = datetime.fromisoformat(data['update_time'].replace('Z', '+00:00'))
+        # Make now timezone-aware if update_time is
+        if update_time.tzinfo is not None:
+            from datetime import timezone
+            now_aware = datetime.now(timezone.utc)
+            age_seconds = (now_aware - update_time).total_seconds()
+        else:
+            age_seconds = (now - update_time).total_seconds()
+        
+        # Check if log file exists and was recently modified
+        log_file = data.get('immich_go_log')
+        log_active = False
+        if log_file and age_seconds > 60:  # Only check log if metadata is stale
+            log_path = METADATA_DIR / log_file
+            if log_path.exists():
+                log_mtime = datetime.fromtimestamp(log_path.stat().st_mtime)
+                log_age = (now - log_mtime).total_seconds()
+                log_active = log_age < 120  # Log modified in last 2 minutes
+        
+        # Only mark as timeout if both metadata and log are stale
+        if age_seconds > 120 and not log_active:  # 2 minutes
+            data = dict(data)
+            data['status'] = 'timeout'
+            data['_timeout_age'] = int(age_seconds)
+    except (ValueError, TypeError):
+        pass
+    return data
+
+
+def try_load_metadata_file(found):
+    """load_metadata_file for a (DirEntry, stat) pair; returns None if it cannot be read."""
+    entry, st = found
+    try:
+        return load_metadata_file(entry, st.st_mtime)
+    except Exception as e:
+        print(f"Error loading {entry.path}: {e}")
+        return None
+
+
+# Parsed metadata and stats, reused until a metadata file is added, removed or changed
+_cache = {'signature': None, 'files': [], 'stats': None}
+_cache_lock = threading.Lock()
+
+
+def get_metadata():
+    """Return (metadata_files, stats), reparsing only when the metadata files change."""
     if not METADATA_DIR.exists():
-        return metadata_files
+        return [], aggregate_stats([])
     
-    now = datetime.now()
+    found = []
+    with os.scandir(METADATA_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".metadata.json"):
+                try:
+                    found.append((entry, entry.stat()))
+                except OSError:
+                    pass
+    signature = frozenset((entry.name, st.st_mtime_ns, st.st_size) for entry, st in found)
     
-    for f in METADATA_DIR.glob("*.metadata.json"):
-        try:
-            # Get file modification time from OS
-            file_mtime = datetime.fromtimestamp(f.stat().st_mtime)
+    with _cache_lock:
+        if signature != _cache['signature']:
+            # Sort by file modification time descending (most recently modified first)
+            found.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
             
-            with open(f) as mf:
-                data = json.load(mf)
-                data['_filename'] = f.name
-                data['_path'] = str(f)
-                data['_modified'] = file_mtime.strftime('%Y-%m-%d %H:%M:%S')
-                data['_modified_iso'] = file_mtime.isoformat()
-                
-                # Check for timeout: if status is 'running' and update_time is older than 2 minutes
-                # Also check if the associated log file is still being written to
-                if data.get('status') == 'running' and 'update_time' in data:
-                    try:
-                        update_time = datetime.fromisoformat(data['update_time'].replace('Z', '+00:00'))
-                        # Make now timezone-aware if update_time is
-                        if update_time.tzinfo is not None:
-                            from datetime import timezone
-                            now_aware = datetime.now(timezone.utc)
-                            age_seconds = (now_aware - update_time).total_seconds()
-                        else:
-                            age_seconds = (now - update_time).total_seconds()
-                        
-                        # Check if log file exists and was recently modified
-                        log_file = data.get('immich_go_log')
-                        log_active = False
-                        if log_file and age_seconds > 60:  # Only check log if metadata is stale
-                            log_path = METADATA_DIR / log_file
-                            if log_path.exists():
-                                log_mtime = datetime.fromtimestamp(log_path.stat().st_mtime)
-                                log_age = (now - log_mtime).total_seconds()
-                                log_active = log_age < 120  # Log modified in last 2 minutes
-                        
-                        # Only mark as timeout if both metadata and log are stale
-                        if age_seconds > 120 and not log_active:  # 2 minutes
-                            data['status'] = 'timeout'
-                            data['_timeout_age'] = int(age_seconds)
-                    except (ValueError, TypeError):
-                        pass
-                
-                # Handle both old zip_file and new zip_files format
-                if 'zip_files' in data:
-                    # New format: array of {name, size}
-                    total_size = sum(z.get('size', 0) for z in data['zip_files'])
-                    data['_zip_size_formatted'] = format_size(total_size)
-                    data['_zip_names'] = ', '.join(z.get('name', '') for z in data['zip_files'])
-                    data['_zip_count'] = len(data['zip_files'])
-                elif 'zip_size' in data:
-                    # Old format: single zip_file and zip_size
-                    data['_zip_size_formatted'] = format_size(data['zip_size'])
-                    data['_zip_names'] = data.get('zip_file', 'N/A')
-                    data['_zip_count'] = 1
-                elif 'total_size' in data:
-                    # Folder import format
-                    data['_zip_size_formatted'] = format_size(data['total_size'])
-                    data['_zip_names'] = data.get('source_name', 'N/A')
-                    data['_zip_count'] = 0
-                
+            # Read and parse on worker threads (map keeps the order), aggregate here in one pass
+            with ThreadPoolExecutor(max_workers=max(1, min(PARSE_WORKERS, len(found)))) as pool:
+                loaded = list(pool.map(try_load_metadata_file, found))
+            metadata_files = []
+            stats = new_stats()
+            for result in loaded:
+                if result is None:
+                    continue
+                data, total_size = result
                 metadata_files.append(data)
-        except Exception as e:
-            print(f"Error loading {f}: {e}")
-    
-    # Sort by file modification time descending (most recently modified first)
-    metadata_files.sort(
-        key=lambda m: m.get('_modified_iso') or '',
-        reverse=True
-    )
+                add_to_stats(stats, data, total_size)
+            stats['_total_size_formatted'] = format_size(stats['total_size'])
+            _cache.update(signature=signature, files=metadata_files, stats=stats)
+        metadata_files, stats = _cache['files'], _cache['stats']
     
-    return metadata_files
+    now = datetime.now()
+    return [check_timeout(m, now) for m in metadata_files], stats
+
+
+def load_metadata_files():
+    """Load all metadata JSON files."""
+    return get_metadata()[0]
 
 
 def get_log_files():
@@ -119,27 +225,89 @@ def get_log_files():
         return []
     
     logs = []
-    for f in logs_dir.glob("*.log"):
-        stat = f.stat()
-        mtime = datetime.fromtimestamp(stat.st_mtime)
+    with os.scandir(logs_dir) as it:
+        entries = [(entry, entry.stat()) for entry in it if entry.name.endswith(".log")]
+    
+    # Sort by modification time descending (most recently modified first)
+    entries.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
+    
+    for entry, stat in entries:
+        modified, modified_iso = format_timestamp(int(stat.st_mtime))
         logs.append({
-            'name': f.name,
-            'path': str(f),
+            'name': entry.name,
+            'path': entry.path,
             'size': format_size(stat.st_size),
-            'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
-            'modified': mtime.strftime('%Y-%m-%d %H:%M:%S'),
-            'modified_iso': mtime.isoformat()
+            'created': format_timestamp(int(stat.st_ctime))[1],
+            'modified': modified,
+            'modified_iso': modified_iso
         })
-    
-    # Sort by modification time descending (most recently modified first)
-    logs.sort(key=lambda l: l['modified_iso'], reverse=True)
     return logs
 
 
-def aggregate_stats(metadata_files):
-    """Aggregate statistics across all imports."""
-    stats = {
-        'total_imports': len(metadata_files),
+def parse_log_line(line):
+    """Parse one JSON log line, keeping unparseable lines as raw text."""
+    try:
+        return loads(line)
+    except ValueError:
+        return {'raw': line.decode('utf-8', errors='replace')}
+
+
+def iter_lines_reversed(f, chunk_size=64 * 1024):
+    """Yield the lines of a binary file from last to first, reading backwards in chunks."""
+    f.seek(0, os.SEEK_END)
+    pos = f.tell()
+    tail = b''
+    while pos > 0:
+        step = min(chunk_size, pos)
+        pos -= step
+        f.seek(pos)
+        lines = (f.read(step) + tail).split(b'\n')
+        tail = lines.pop(0)
+        yield from reversed(lines)
+    yield tail
+
+
+def read_log_entries(filepath, level=None, limit=None):
+    """Parse log entries, keeping those matching level.
+    
+    With a limit, the file is read from the end and parsing stops once
+    the last `limit` matching entries have been found.
+    """
+    level = level.upper() if level else None
+    # Cheap byte search first so only lines that can match are JSON-parsed
+    prefilter = None
+    if level:
+        prefilter = re.compile(rb'"level"\s*:\s*"' + re.escape(level.encode()) + rb'"', re.IGNORECASE)
+    
+    def matches(entry):
+        return level is None or (isinstance(entry, dict) and str(entry.get('level', '')).upper() == level)
+    
+    entries = []
+    with open(filepath, 'rb') as f:
+        if limit and limit > 0:
+            for line in iter_lines_reversed(f):
+                line = line.strip()
+                if line and (prefilter is None or prefilter.search(line)):
+                    entry = parse_log_line(line)
+                    if matches(entry):
+                        entries.append(entry)
+                        if len(entries) == limit:
+                            break
+            entries.reverse()
+        else:
+            for line in f:
+                line = line.strip()
+                if line and (prefilter is None or prefilter.search(line)):
+                    entry = parse_log_line(line)
+                    if matches(entry):
+                        entries.append(entry)
+    return entries
+
+
+def new_stats():
+    """Return an empty aggregate statistics dict."""
+    return {
+        'total_imports': 0,
         'file_count': 0,
         'total_size': 0,
         'by_type': {'immich-go': 0, 'extract': 0},
@@ -151,33 +319,41 @@ def aggregate_stats(metadata_files):
         'extracted': 0,
         'errors': 0
     }
+
+
+def add_to_stats(stats, m, total_size):
+    """Add one import's metadata (and its precomputed size) to the aggregate stats."""
+    stats['total_imports'] += 1
+    stats['file_count'] += m.get('file_count', 0)
+    stats['total_size'] += total_size
+    
+    import_type = m.get('import_type', 'unknown')
+    if import_type in stats['by_type']:
+        stats['by_type'][import_type] += 1
+    
+    source_type = m.get('source_type', 'unknown')
+    if source_type in stats['by_source']:
+        stats['by_source'][source_type] += 1
     
+    summary = m.get('summary', {})
+    stats['uploaded'] += summary.get('uploaded_success', 0)
+    stats['server_duplicate'] += summary.get('server_duplicate', 0)
+    stats['local_duplicate'] += summary.get('local_duplicate', 0)
+    stats['server_better'] += summary.get('server_better', 0)
+    stats['extracted'] += summary.get('extracted', 0)
+    stats['errors'] += summary.get('errors', 0)
+
+
+def aggregate_stats(metadata_files):
+    """Aggregate statistics across all imports."""
+    stats = new_stats()
     for m in metadata_files:
-        stats['file_count'] += m.get('file_count', 0)
-        
         # Handle both zip_files array and old zip_size format
         if 'zip_files' in m:
-            stats['total_size'] += sum(z.get('size', 0) for z in m['zip_files'])
-        elif 'zip_size' in m:
-            stats['total_size'] += m.get('zip_size', 0)
-        elif 'total_size' in m:
-            stats['total_size'] += m.get('total_size', 0)
-        
-        import_type = m.get('import_type', 'unknown')
-        if import_type in stats['by_type']:
-            stats['by_type'][import_type] += 1
-        
-        source_type = m.get('source_type', 'unknown')
-        if source_type in stats['by_source']:
-            stats['by_source'][source_type] += 1
-        
-        summary = m.get('summary', {})
-        stats['uploaded'] += summary.get('uploaded_success', 0)
-        stats['server_duplicate'] += summary.get('server_duplicate', 0)
-        stats['local_duplicate'] += summary.get('local_duplicate', 0)
-        stats['server_better'] += summary.get('server_better', 0)
-        stats['extracted'] += summary.get('extracted', 0)
-        stats['errors'] += summary.get('errors', 0)
+            total_size = sum(z.get('size', 0) for z in m['zip_files'])
+        else:
+            total_size = m.get('zip_size', m.get('total_size', 0))
+        add_to_stats(stats, m, total_size)
     
     stats['_total_size_formatted'] = format_size(stats['total_size'])
     return stats
@@ -186,8 +362,7 @@ def aggregate_stats(metadata_files):
 @app.route('/')
 def index():
     """Main dashboard."""
-    metadata_files = load_metadata_files()
-    stats = aggregate_stats(metadata_files)
+    metadata_files, stats = get_metadata()
     logs = get_log_files()
     return render_template('index.html', 
                          metadata_files=metadata_files, 
@@ -198,7 +373,7 @@ def index():
 @app.route('/api/metadata')
 def api_metadata():
     """API endpoint for metadata files."""
-    return jsonify(load_metadata_files())
+    return json_response(load_metadata_files(), conditional=True)
 
 
 @app.route('/api/metadata/<filename>')
@@ -206,26 +381,25 @@ def api_metadata_detail(filename):
     """API endpoint for specific metadata file."""
     filepath = METADATA_DIR / filename
     if not filepath.exists():
-        return jsonify({'error': 'Not found'}), 404
+        return json_response({'error': 'Not found'}, 404)
     
     try:
-        with open(filepath) as f:
-            return jsonify(json.load(f))
+        with open(filepath, 'rb') as f:
+            return json_response(loads(f.read()))
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for aggregate statistics."""
-    metadata_files = load_metadata_files()
-    return jsonify(aggregate_stats(metadata_files))
+    return json_response(get_metadata()[1], conditional=True)
 
 
 @app.route('/api/logs')
 def api_logs():
     """API endpoint for log files."""
-    return jsonify(get_log_files())
+    return json_response(get_log_files(), conditional=True)
 
 
 @app.route('/api/logs/<filename>')
@@ -235,33 +409,19 @@ def api_log_content(filename):
     filepath = logs_dir / filename
     
     if not filepath.exists():
-        return jsonify({'error': 'Not found'}), 404
-    
-    # Parse JSON log entries
-    entries = []
-    try:
-        with open(filepath) as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        entries.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        entries.append({'raw': line})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': 'Not found'}, 404)
     
     # Get query params for filtering
     level = request.args.get('level')
     limit = request.args.get('limit', type=int)
     
-    if level:
-        entries = [e for e in entries if e.get('level', '').upper() == level.upper()]
-    
-    if limit:
-        entries = entries[-limit:]
+    # Parse JSON log entries
+    try:
+        entries = read_log_entries(filepath, level=level, limit=limit)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
     
-    return jsonify({
+    return json_response({
         'filename': filename,
         'total_entries': len(entries),
         'entries': entries
@@ -276,8 +436,8 @@ def view_metadata(filename):
         return "Not found", 404
     
     try:
-        with open(filepath) as f:
-            metadata = json.load(f)
+        with open(filepath, 'rb') as f:
+            metadata = loads(f.read())
         return render_template('detail.html', metadata=metadata, filename=filename)
     except Exception as e:
         return f"Error: {e}", 500
@@ -294,12 +454,13 @@ def view_log(filename):
     
     # Get file timestamps
     stat = filepath.stat()
-    created = datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
-    modified = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+    created = format_timestamp(int(stat.st_ctime))[0]
+    modified = format_timestamp(int(stat.st_mtime))[0]
     
     return render_template('log.html', filename=filename, created=created, modified=modified)
 
 
+# The container runs this under gunicorn (see Dockerfile); app.run is for local development
 if __name__ == '__main__':
     print(f"Starting Metadata Viewer...")
     print(f"Metadata directory: {METADATA_DIR}")
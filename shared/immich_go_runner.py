@@ -394,8 +394,8 @@ class ImmichGoRunner:
             tail_thread.start()
             
             try:
-                # Run the command
-                result = subprocess.run(cmd, capture_output=False, text=True)
+                # Run the command; output goes straight to the inherited stdout/stderr
+                result = subprocess.run(cmd, check=False)
                 last_exit_code = result.returncode
             finally:
                 # Stop the tail thread and wait for it to finish processing
@@ -64,6 +64,8 @@ class ImportProcessor:
         self.metadata_dir = metadata_dir or DEFAULT_METADATA_DIR
         self.extract_base_dir = extract_base_dir or DEFAULT_EXTRACT_DIR
         self.copy_failed_files = copy_failed_files if copy_failed_files is not None else DEFAULT_COPY_FAILED_FILES
+        self._finalize_pool = None
+        self._pending = []
         self.log_config()
     
     def log_config(self):
@@ -78,7 +80,8 @@ class ImportProcessor:
         self,
         zip_files: list[Path],
         export_prefix: str,
-        delete_after_import: bool = False
+        delete_after_import: bool = False,
+        background: bool = False
     ) -> tuple[bool, dict]:
         """
         Process Google Photos takeout zip files:
@@ -88,6 +91,9 @@ class ImportProcessor:
         4. Update metadata with results
         5. Optionally delete zips (only if no errors)
         
+        With background=True, steps 3-5 run on a worker thread so the caller
+        can start the next import; call wait_for_background() before exiting.
+        
         Returns: (success, immich_results)
         """
         # Create 'running' metadata before starting import
@@ -136,7 +142,40 @@ class ImportProcessor:
         is_success = self.runner.is_success(exit_code, immich_results)
         
         print(f"[INFO] Import results: {self.runner.get_summary_line(immich_results)}")
-                
+        
+        args = (zip_files, export_prefix, metadata, exit_code, immich_results,
+                is_success, has_errors, delete_after_import)
+        if background:
+            if self._finalize_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._finalize_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-finalize")
+            self._pending.append((export_prefix, self._finalize_pool.submit(self._finalize_google_photos_import, *args)))
+        else:
+            self._finalize_google_photos_import(*args)
+        
+        return is_success, immich_results
+    
+    def wait_for_background(self):
+        """Block until all background finalization work has finished."""
+        pending, self._pending = self._pending, []
+        for export_prefix, future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[ERROR] Post-import processing failed for {export_prefix}: {e}")
+    
+    def _finalize_google_photos_import(
+        self,
+        zip_files: list[Path],
+        export_prefix: str,
+        metadata,
+        exit_code: int,
+        immich_results: dict,
+        is_success: bool,
+        has_errors: bool,
+        delete_after_import: bool
+    ):
+        """Extract leftovers, record final metadata and delete zips after an import."""
         # Apply immich-go results to manifest (dict keyed by path)
         apply_immich_results_to_manifest(metadata.file_manifest, immich_results)
         
@@ -196,8 +235,6 @@ class ImportProcessor:
             print(f"[INFO] Deleted {deleted_count} zip file(s)")
         elif delete_after_import and has_errors:
             print(f"[WARNING] Not deleting zips due to {immich_results.get('summary', {}).get('errors', 0)} errors")
-        
-        return is_success, immich_results
     
     def process_folder(
         self,
@@ -9,6 +9,7 @@ Used by:
 import json
 import os
 import shutil
+import struct
 import zipfile
 from datetime import datetime
 from pathlib import Path
@@ -84,6 +85,67 @@ def get_zip_contents(zip_path: Path) -> dict[str, dict]:
     return contents
 
 
+def zip_central_directory_range(f, file_size: int) -> tuple[int, int] | None:
+    """Locate the central directory of an open zip via the EOCD record (zip64 aware).
+    
+    Returns (offset, size) or None if the EOCD could not be found.
+    """
+    tail_size = min(file_size, 65536 + 22)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    eocd = tail.rfind(b'PK\x05\x06')
+    if eocd < 0 or eocd + 22 > len(tail):
+        return None
+    cd_size, cd_offset = struct.unpack('<II', tail[eocd + 12:eocd + 20])
+    if cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF:
+        # Zip64: the locator sits just before the EOCD and points at the zip64 EOCD record
+        locator = eocd - 20
+        if locator < 0 or tail[locator:locator + 4] != b'PK\x06\x07':
+            return None
+        zip64_eocd_offset = struct.unpack('<Q', tail[locator + 8:locator + 16])[0]
+        f.seek(zip64_eocd_offset)
+        record = f.read(56)
+        if len(record) < 56 or record[:4] != b'PK\x06\x06':
+            return None
+        cd_size, cd_offset = struct.unpack('<QQ', record[40:56])
+    if cd_offset + cd_size > file_size:
+        return None
+    return cd_offset, cd_size
+
+
+def read_zip_names(zip_path: Path) -> list[str] | None:
+    """Read member names straight from a zip's central directory.
+    
+    Reads the central directory in one go and walks the fixed 46-byte entry
+    headers, without building ZipInfo objects or touching local headers.
+    Returns None if the central directory is missing or malformed.
+    """
+    try:
+        with open(zip_path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            cd_range = zip_central_directory_range(f, file_size) if file_size else None
+            if cd_range is None:
+                return None
+            cd_offset, cd_size = cd_range
+            f.seek(cd_offset)
+            cd = f.read(cd_size)
+    except OSError:
+        return None
+    
+    names = []
+    pos = 0
+    while pos + 46 <= len(cd):
+        if cd[pos:pos + 4] != b'PK\x01\x02':
+            return None
+        flags = struct.unpack_from('<H', cd, pos + 8)[0]
+        name_len, extra_len, comment_len = struct.unpack_from('<HHH', cd, pos + 28)
+        raw_name = cd[pos + 46:pos + 46 + name_len]
+        # Bit 11 marks UTF-8 names; otherwise the zip spec says CP437
+        names.append(raw_name.decode('utf-8' if flags & 0x800 else 'cp437', errors='replace'))
+        pos += 46 + name_len + extra_len + comment_len
+    return names
+
+
 def get_folder_contents(folder_path: Path, base_path: Optional[Path] = None) -> dict[str, dict]:
     """Get a dict of all files in a folder with their sizes and metadata, keyed by relative path."""
     contents = {}
@@ -4,6 +4,7 @@ import re
 import subprocess
 import sys
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add shared module to path (works both locally and in Docker)
@@ -13,12 +14,17 @@ if (_script_dir / "shared").exists():
 else:
     sys.path.insert(0, str(_script_dir.parent / "shared"))
 from import_metadata import ImportMetadata
+from takeout_utils import is_google_photos_path, read_zip_names
 
 # CONFIGURABLE PATHS (mapped in container)
 RCLONE_REMOTE = os.getenv("RCLONE_REMOTE", "gdrive:Takeout")  # rclone remote:path where Takeout exports appear
 GDRIVE_DIR = Path(os.getenv("GDRIVE_DIR", "/data/gdrive/Takeout"))  # Primary sync location
 METADATA_DIR = Path(os.getenv("METADATA_DIR", "/data/metadata"))  # Extraction metadata directory
 DELETE_AFTER_EXTRACT = os.getenv("DELETE_AFTER_EXTRACT", "true").lower() == "true"
+INSPECT_WORKERS = int(os.getenv("INSPECT_WORKERS", str(min(8, (os.cpu_count() or 1) * 2))))
+
+# Numbered takeout part, e.g. takeout-20240427T195310Z-001.zip
+MULTIPART_RE = re.compile(r'(?P<prefix>.+)-(?P<part>\d{3})\.zip$')
 
 
 def save_extraction_metadata(zip_path, extract_dir, related_parts=None):
@@ -44,6 +50,38 @@ def ensure_dirs():
     METADATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# Central directory listings keyed by (path, mtime_ns, size); None marks a zip
+# that could not be opened. Lets validation, the Google Photos check and
+# post-extraction verification share one central directory read per zip.
+_zip_index_cache: dict[tuple[str, int, int], list[zipfile.ZipInfo] | None] = {}
+
+# Google Photos verdicts, same key as above
+_photos_cache: dict[tuple[str, int, int], bool] = {}
+
+
+def _zip_key(zip_path):
+    st = zip_path.stat()
+    return (str(zip_path), st.st_mtime_ns, st.st_size)
+
+
+def get_zip_index(zip_path):
+    """Return the zip's infolist (cached), or None if it is invalid/corrupted/missing."""
+    try:
+        key = _zip_key(zip_path)
+    except OSError as e:
+        # e.g. deleted by immich-import since the directory was listed
+        print(f"[WARNING] Cannot stat zip file {zip_path.name}: {e}")
+        return None
+    if key not in _zip_index_cache:
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zf:
+                _zip_index_cache[key] = zf.infolist()
+        except (zipfile.BadZipFile, OSError) as e:
+            print(f"[WARNING] Invalid/corrupted zip file {zip_path.name}: {e}")
+            _zip_index_cache[key] = None
+    return _zip_index_cache[key]
+
+
 def is_valid_zip(zip_path, full_check=False):
     """Check if a zip file is valid.
     
@@ -53,17 +91,18 @@ def is_valid_zip(zip_path, full_check=False):
                    If False, just check if the zip can be opened (fast).
     """
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            # Always do a quick check that we can read the central directory
-            _ = zf.namelist()
-            
-            if full_check:
-                # Full integrity check - reads entire file
+        # Always do a quick check that we can read the central directory
+        if get_zip_index(zip_path) is None:
+            return False
+        
+        if full_check:
+            # Full integrity check - reads entire file
+            with zipfile.ZipFile(zip_path, 'r') as zf:
                 bad_file = zf.testzip()
-                if bad_file:
-                    print(f"[WARNING] Corrupted file in zip: {bad_file}")
-                    return False
-            return True
+            if bad_file:
+                print(f"[WARNING] Corrupted file in zip: {bad_file}")
+                return False
+        return True
     except zipfile.BadZipFile as e:
         print(f"[WARNING] Invalid/corrupted zip file {zip_path.name}: {e}")
         return False
@@ -75,11 +114,19 @@ def is_valid_zip(zip_path, full_check=False):
 def has_google_photos(zip_path):
     """Check if a zip file contains Google Photos content."""
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            for name in zf.namelist():
-                if "Google Photos" in name or "Google Foto's" in name:
-                    return True
-        return False
+        key = _zip_key(zip_path)
+        if key in _photos_cache:
+            return _photos_cache[key]
+        # Raw central directory names avoid building ZipInfo objects for the
+        # (large) photo archives, which are never extracted here
+        names = read_zip_names(zip_path)
+        if names is None:
+            infos = get_zip_index(zip_path)
+            if infos is None:
+                return False
+            names = (info.filename for info in infos)
+        _photos_cache[key] = any(is_google_photos_path(name) for name in names)
+        return _photos_cache[key]
     except Exception as e:
         # If we can't read it, assume it might be multi-part and skip
         return False
@@ -87,16 +134,14 @@ def has_google_photos(zip_path):
 
 def get_multipart_group(zip_path):
     """Get all parts of a multi-part archive by finding matching numbered files."""
-    import re
-    # Match pattern like takeout-20240427T195310Z-001.zip
-    match = re.match(r'(.+)-(\d{3})\.zip$', zip_path.name)
+    match = MULTIPART_RE.match(zip_path.name)
     if not match:
         return [zip_path]
     
-    prefix = match.group(1)
+    prefix = match.group('prefix')
     parts = []
     for sibling in zip_path.parent.glob(f"{prefix}-*.zip"):
-        if re.match(r'.+-\d{3}\.zip$', sibling.name):
+        if MULTIPART_RE.match(sibling.name):
             parts.append(sibling)
     
     return sorted(parts) if parts else [zip_path]
@@ -105,37 +150,39 @@ def get_multipart_group(zip_path):
 def verify_extraction(zip_path, extract_dir):
     """Verify that all files from a zip were extracted correctly."""
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zf:
-            missing_files = []
-            size_mismatches = []
-            
-            for info in zf.infolist():
-                # Skip directories
-                if info.is_dir():
-                    continue
-                
-                extracted_path = extract_dir / info.filename
-                
-                if not extracted_path.exists():
-                    missing_files.append(info.filename)
-                elif extracted_path.stat().st_size != info.file_size:
-                    size_mismatches.append((info.filename, info.file_size, extracted_path.stat().st_size))
-            
-            if missing_files:
-                print(f"[ERROR] Missing {len(missing_files)} files after extraction:")
-                for f in missing_files[:5]:  # Show first 5
-                    print(f"[ERROR]   - {f}")
-                if len(missing_files) > 5:
-                    print(f"[ERROR]   ... and {len(missing_files) - 5} more")
-                return False
+        infos = get_zip_index(zip_path)
+        if infos is None:
+            raise zipfile.BadZipFile(f"cannot read {zip_path.name}")
+        missing_files = []
+        size_mismatches = []
+        
+        for info in infos:
+            # Skip directories
+            if info.is_dir():
+                continue
             
-            if size_mismatches:
-                print(f"[ERROR] {len(size_mismatches)} files have size mismatches:")
-                for f, expected, actual in size_mismatches[:5]:
-                    print(f"[ERROR]   - {f}: expected {expected}, got {actual}")
-                return False
+            extracted_path = extract_dir / info.filename
             
-            return True
+            if not extracted_path.exists():
+                missing_files.append(info.filename)
+            elif extracted_path.stat().st_size != info.file_size:
+                size_mismatches.append((info.filename, info.file_size, extracted_path.stat().st_size))
+        
+        if missing_files:
+            print(f"[ERROR] Missing {len(missing_files)} files after extraction:")
+            for f in missing_files[:5]:  # Show first 5
+                print(f"[ERROR]   - {f}")
+            if len(missing_files) > 5:
+                print(f"[ERROR]   ... and {len(missing_files) - 5} more")
+            return False
+        
+        if size_mismatches:
+            print(f"[ERROR] {len(size_mismatches)} files have size mismatches:")
+            for f, expected, actual in size_mismatches[:5]:
+                print(f"[ERROR]   - {f}: expected {expected}, got {actual}")
+            return False
+        
+        return True
     except Exception as e:
         print(f"[ERROR] Failed to verify extraction: {e}")
         return False
@@ -208,6 +255,24 @@ def extract_zip(zip_path, related_parts=None):
         return False
 
 
+def _prefetch_zip(zip_path):
+    """Warm the caches for one zip: photo check, then the index if it may be extracted."""
+    try:
+        if not has_google_photos(zip_path):
+            get_zip_index(zip_path)
+    except Exception as e:
+        print(f"[WARNING] Failed to prefetch {zip_path.name}: {e}")
+
+
+def prefetch_zips(zip_paths):
+    """Read the central directories of all zips concurrently so the
+    sequential pass below only hits the caches."""
+    if INSPECT_WORKERS <= 1 or len(zip_paths) <= 1:
+        return
+    with ThreadPoolExecutor(max_workers=INSPECT_WORKERS) as executor:
+        list(executor.map(_prefetch_zip, zip_paths))
+
+
 def process_extracted_zips():
     """Find and extract zips that don't contain Google Photos."""
     print(f"[INFO] Checking for zips to extract...")
@@ -217,35 +282,18 @@ def process_extracted_zips():
     skipped_corrupt = 0
     processed_files = set()
     
-    for zip_path in sorted(GDRIVE_DIR.rglob("*.zip")):
-        if not zip_path.is_file() or zip_path in processed_files:
-            continue
-        
-        # Quick check if zip can be opened (reads central directory only)
-        if not is_valid_zip(zip_path, full_check=False):
-            print(f"[WARNING] Skipping corrupted/incomplete zip: {zip_path.name}")
-            skipped_corrupt += 1
-            processed_files.add(zip_path)
+    all_zips = [p for p in sorted(GDRIVE_DIR.rglob("*.zip")) if p.is_file()]
+    prefetch_zips(all_zips)
+    
+    for zip_path in all_zips:
+        if zip_path in processed_files:
             continue
         
         # Get all parts of this archive (if multi-part)
         related_parts = get_multipart_group(zip_path)
         
-        # Quick validate all parts if multi-part
-        if len(related_parts) > 1:
-            all_valid = True
-            for part in related_parts:
-                if not is_valid_zip(part, full_check=False):
-                    print(f"[WARNING] Multi-part archive has corrupted part: {part.name}")
-                    all_valid = False
-                    break
-            
-            if not all_valid:
-                print(f"[WARNING] Skipping incomplete multi-part archive ({len(related_parts)} parts)")
-                processed_files.update(related_parts)
-                continue
-        
-        # Check if any part contains Google Photos (let immich-go handle those)
+        # Check if any part contains Google Photos (let immich-go handle those).
+        # Done before validation so photo archives never get a full zipfile parse.
         has_photos = False
         for part in related_parts:
             if has_google_photos(part):
@@ -260,6 +308,19 @@ def process_extracted_zips():
             processed_files.update(related_parts)
             continue
         
+        # Quick check that every part can be opened (reads central directory only).
+        # zip_path is one of related_parts, so each part is validated exactly once.
+        bad_part = next((part for part in related_parts if not is_valid_zip(part, full_check=False)), None)
+        if bad_part is not None:
+            if len(related_parts) > 1:
+                print(f"[WARNING] Multi-part archive has corrupted part: {bad_part.name}")
+                print(f"[WARNING] Skipping incomplete multi-part archive ({len(related_parts)} parts)")
+            else:
+                print(f"[WARNING] Skipping corrupted/incomplete zip: {zip_path.name}")
+            skipped_corrupt += 1
+            processed_files.update(related_parts)
+            continue
+        
         # Extract non-photos archives (extraction will fail if corrupt)
         if extract_zip(zip_path, related_parts):
             extracted_groups += 1